@@ -1,10 +1,32 @@
+import time
+SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+import os
+import re
 import json
-import pandas as pd
-from datetime import datetime
+import math
+import hashlib
+import hmac
+import ipaddress
+import sqlite3
+import threading
+from collections import Counter, OrderedDict, deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.cookiejar import DefaultCookiePolicy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from urllib.parse import parse_qs, quote, urlparse
 import random
+# pandas is imported where it is used (Batch, Analytics) to keep it off the cold start path
+
+IMPORT_SECONDS = time.perf_counter() - SCRIPT_STARTED
 
 # ==========================================
 # PAGE CONFIGURATION & MATRIX THEMING
@@ -16,509 +38,2443 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Enhanced Matrix-inspired CSS
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Share+Tech+Mono&family=Orbitron:wght@400;700;900&display=swap');
-    
-    /* Global Matrix Theme */
-    html, body, [class*="css"] {
-        font-family: 'Share Tech Mono', monospace;
-        background-color: #0d0d0d !important;
-        color: #00ff41 !important;
-    }
+# Matrix theme: a static asset the browser caches, inlined only when static serving is off
+THEME_CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "theme.css")
 
-    .main {
-        background: linear-gradient(180deg, #000000 0%, #0a0e0a 50%, #000000 100%);
-        background-attachment: fixed;
-    }
+@st.cache_resource
+def load_theme_css():
+    with open(THEME_CSS_PATH) as f:
+        return f.read()
 
-    /* Matrix Rain Effect Background */
-    .main::before {
-        content: "";
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background-image: 
-            repeating-linear-gradient(
-                0deg,
-                transparent,
-                transparent 2px,
-                rgba(0, 255, 65, 0.03) 2px,
-                rgba(0, 255, 65, 0.03) 4px
-            );
-        pointer-events: none;
-        z-index: 0;
-        animation: matrix-scan 10s linear infinite;
-    }
+if st.get_option("server.enableStaticServing"):
+    st.markdown('<link rel="stylesheet" href="app/static/theme.css">', unsafe_allow_html=True)
+else:
+    st.markdown(f"<style>{load_theme_css()}</style>", unsafe_allow_html=True)
 
-    @keyframes matrix-scan {
-        0% { transform: translateY(0); }
-        100% { transform: translateY(20px); }
-    }
+# ==========================================
+# CONSTANTS & API CONFIGURATION
+# ==========================================
+# Upstream base URLs. CLONER_API_BASE_URL points every service at one host
+# (e.g. the bundled mock_server.py); the per-service variables override it.
+API_BASE_URL = os.environ.get("CLONER_API_BASE_URL", "").rstrip("/")
+AVATAR_BASE_URL = os.environ.get("CLONER_AVATAR_BASE_URL", API_BASE_URL or "https://avatar.pipio.ai").rstrip("/")
+GENERATE_BASE_URL = os.environ.get("CLONER_GENERATE_BASE_URL", API_BASE_URL or "https://generate.pipio.ai").rstrip("/")
+PROJECT_BASE_URL = os.environ.get("CLONER_PROJECT_BASE_URL", API_BASE_URL or "https://project.pipio.ai").rstrip("/")
+OPENAI_BASE_URL = os.environ.get("CLONER_OPENAI_BASE_URL", API_BASE_URL or "https://api.openai.com").rstrip("/")
+
+API_ENDPOINTS = {
+    "AVATAR_LIST": f"{AVATAR_BASE_URL}/actor",
+    "VOICE_LIST": f"{AVATAR_BASE_URL}/voice",
+    "GENERATE_CLIP": f"{GENERATE_BASE_URL}/single-clip",
+    "DUBBING": f"{PROJECT_BASE_URL}/project/generate/dubbingV2",
+    "LIPSYNC": f"{PROJECT_BASE_URL}/project/generate/lipsync",
+    "PROJECT": f"{PROJECT_BASE_URL}/project",
+}
+
+OPENAI_API_ENDPOINT = f"{OPENAI_BASE_URL}/v1/chat/completions"
+
+SCRIPT_TYPES = ["general", "marketing", "educational", "storytelling", "technical", "entertainment", "news", "motivational"]
+SCRIPT_TONES = ["professional", "casual", "friendly", "authoritative", "enthusiastic", "calm", "urgent", "inspiring"]
+
+# Local working directory for persisted state (batches, caches)
+DATA_DIR = os.environ.get("CLONER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cloner"))
+
+# Avatar/voice catalog freshness; stale catalogs are served while refreshing
+CATALOG_TTL = int(os.environ.get("CLONER_CATALOG_TTL", 3600))
+
+# Generated script cache (LRU, persisted under DATA_DIR)
+SCRIPT_CACHE_PATH = os.path.join(DATA_DIR, "script_cache.json")
+SCRIPT_CACHE_MAX_ENTRIES = int(os.environ.get("CLONER_SCRIPT_CACHE_SIZE", 500))
+
+# Connection pool sizing per upstream host (override with env vars)
+HTTP_POOL_DEFAULT_SIZE = int(os.environ.get("CLONER_HTTP_POOL_SIZE", 10))
+HTTP_POOL_SIZES = {
+    urlparse(AVATAR_BASE_URL).netloc: int(os.environ.get("CLONER_POOL_AVATAR", HTTP_POOL_DEFAULT_SIZE)),
+    urlparse(GENERATE_BASE_URL).netloc: int(os.environ.get("CLONER_POOL_GENERATE", HTTP_POOL_DEFAULT_SIZE)),
+    urlparse(PROJECT_BASE_URL).netloc: int(os.environ.get("CLONER_POOL_PROJECT", HTTP_POOL_DEFAULT_SIZE)),
+    urlparse(OPENAI_BASE_URL).netloc: int(os.environ.get("CLONER_POOL_OPENAI", HTTP_POOL_DEFAULT_SIZE)),
+}
+
+# Process-wide request budget per upstream host in requests/sec, set to the provider's limit.
+# 0 (the default) means no budget: the host is neither rate- nor concurrency-capped, only 429s are waited out.
+# A budgeted host also caps concurrent requests at its pool size.
+RATE_LIMIT_DEFAULT_RPS = float(os.environ.get("CLONER_RATE_LIMIT_RPS", 0))
+RATE_LIMITS = {
+    urlparse(AVATAR_BASE_URL).netloc: float(os.environ.get("CLONER_RATE_AVATAR", RATE_LIMIT_DEFAULT_RPS)),
+    urlparse(GENERATE_BASE_URL).netloc: float(os.environ.get("CLONER_RATE_GENERATE", RATE_LIMIT_DEFAULT_RPS)),
+    urlparse(PROJECT_BASE_URL).netloc: float(os.environ.get("CLONER_RATE_PROJECT", RATE_LIMIT_DEFAULT_RPS)),
+    urlparse(OPENAI_BASE_URL).netloc: float(os.environ.get("CLONER_RATE_OPENAI", RATE_LIMIT_DEFAULT_RPS)),
+}
+RATE_LIMIT_MAX_WAIT = 120  # seconds a caller may queue for a slot before giving up
+RATE_LIMIT_MAX_THROTTLED = 3  # 429 responses waited out per call before returning the error
+RATE_LIMIT_DEFAULT_BACKOFF = 1.0  # pause when a 429 carries no Retry-After
+
+# Idempotent methods whose identical in-flight calls share one upstream request
+SINGLE_FLIGHT_METHODS = ("GET", "HEAD")
+
+# (connect, read) timeouts in seconds, keyed by endpoint name
+API_TIMEOUTS = {
+    "AVATAR_LIST": (3.05, 20),
+    "VOICE_LIST": (3.05, 20),
+    "GENERATE_CLIP": (3.05, 30),
+    "DUBBING": (3.05, 60),
+    "LIPSYNC": (3.05, 60),
+    "PROJECT": (3.05, 15),
+    "OPENAI": (3.05, 120),
+}
+DEFAULT_API_TIMEOUT = (3.05, 30)
+MAX_SUBMIT_ATTEMPTS = 4  # job submissions retried only when the request never reached the server
+
+# Upper bounds (seconds) of the per-endpoint latency histogram
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf")]
+
+# ==========================================
+# API HELPER FUNCTIONS
+# ==========================================
+def get_avatar_headers():
+    """Get headers for avatar API"""
+    return avatar_headers_for(st.session_state.avatar_api_key)
 
-    /* Glitch Animation */
-    @keyframes glitch {
-        0% { text-shadow: 2px 2px #00ff41, -2px -2px #00ff41; }
-        25% { text-shadow: -2px 2px #00ff41, 2px -2px #39ff14; }
-        50% { text-shadow: 2px -2px #39ff14, -2px 2px #00ff41; }
-        75% { text-shadow: -2px -2px #00ff41, 2px 2px #39ff14; }
-        100% { text-shadow: 2px 2px #00ff41, -2px -2px #00ff41; }
+def avatar_headers_for(api_key):
+    return {
+        "Authorization": f"Key {api_key}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
     }
 
-    /* Main Header */
-    .matrix-header {
-        font-family: 'Orbitron', monospace;
-        font-size: 3.5rem;
-        font-weight: 900;
-        color: #00ff41;
-        text-align: center;
-        margin: 2rem 0 1rem 0;
-        text-transform: uppercase;
-        letter-spacing: 8px;
-        text-shadow: 0 0 10px #00ff41, 0 0 20px #00ff41, 0 0 30px #00ff41;
-        animation: glitch 3s infinite;
+def get_openai_headers():
+    """Get headers for OpenAI API"""
+    return {
+        "Authorization": f"Bearer {st.session_state.openai_api_key}",
+        "Content-Type": "application/json"
     }
+
+@st.cache_resource
+def get_http_pool():
+    """Process-wide registry of keep-alive sessions, one per upstream host"""
+    return {}
+
+HTTP_POOL = get_http_pool()
+
+def get_http_session(url):
+    """Get (or lazily create) the pooled session for the URL's host"""
+    host = urlparse(url).netloc
+    session = HTTP_POOL.get(host)
+    if session is None:
+        pool_size = HTTP_POOL_SIZES.get(host, HTTP_POOL_DEFAULT_SIZE)
+        session = requests.Session()
+        # Shared by every user and API key, so upstream cookies must never be stored and replayed
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session = HTTP_POOL.setdefault(host, session)
+    return session
+
+@st.cache_resource
+def get_rate_limiters():
+    """Process-wide token buckets, one per upstream host, shared by every session and worker thread"""
+    return {"lock": threading.Lock(), "hosts": {}}
+
+RATE_LIMITERS = get_rate_limiters()
+
+def get_rate_limiter(url):
+    """Get (or lazily create) the limiter for the URL's host"""
+    host = urlparse(url).netloc
+    with RATE_LIMITERS["lock"]:
+        limiter = RATE_LIMITERS["hosts"].get(host)
+        if limiter is None:
+            rate = RATE_LIMITS.get(host, RATE_LIMIT_DEFAULT_RPS)
+            concurrency = HTTP_POOL_SIZES.get(host, HTTP_POOL_DEFAULT_SIZE) if rate > 0 else 0
+            limiter = RATE_LIMITERS["hosts"][host] = {
+                "host": host,
+                "cond": threading.Condition(),
+                "rate": rate,
+                "burst": max(rate, 1.0),
+                "tokens": max(rate, 1.0),
+                "refilled_at": time.monotonic(),
+                "max_in_flight": concurrency,
+                "in_flight": 0,
+                "blocked_until": 0.0,
+                "queue": deque(),
+            }
+    return limiter
+
+def acquire_rate_slot(limiter, max_wait=RATE_LIMIT_MAX_WAIT):
+    """Wait in FIFO order for a token and a concurrency slot; returns seconds waited, or None on timeout"""
+    started = time.monotonic()
+    deadline = started + max_wait
+    ticket = object()
+    with limiter["cond"]:
+        # Unbudgeted host that is not paused by a 429: no queueing at all
+        if limiter["rate"] <= 0 and not limiter["max_in_flight"] and started >= limiter["blocked_until"]:
+            limiter["in_flight"] += 1
+            return 0.0
+        limiter["queue"].append(ticket)
+        try:
+            while True:
+                now = time.monotonic()
+                if limiter["rate"] > 0:
+                    elapsed = now - limiter["refilled_at"]
+                    limiter["tokens"] = min(limiter["burst"], limiter["tokens"] + elapsed * limiter["rate"])
+                limiter["refilled_at"] = now
+                
+                wait = None  # not at the head or no free slot: woken by notify
+                has_slot = not limiter["max_in_flight"] or limiter["in_flight"] < limiter["max_in_flight"]
+                if limiter["queue"][0] is ticket and has_slot:
+                    if now < limiter["blocked_until"]:
+                        wait = limiter["blocked_until"] - now
+                    elif limiter["rate"] <= 0 or limiter["tokens"] >= 1:
+                        limiter["tokens"] -= 1 if limiter["rate"] > 0 else 0
+                        limiter["in_flight"] += 1
+                        return now - started
+                    else:
+                        wait = (1 - limiter["tokens"]) / limiter["rate"]
+                if now >= deadline:
+                    return None
+                limiter["cond"].wait(deadline - now if wait is None else min(wait, deadline - now))
+        finally:
+            limiter["queue"].remove(ticket)
+            limiter["cond"].notify_all()
+
+def release_rate_slot(limiter):
+    with limiter["cond"]:
+        limiter["in_flight"] -= 1
+        limiter["cond"].notify_all()
+
+def retry_after_seconds(response):
+    """Delay asked for by a Retry-After header, given in seconds or as an HTTP date"""
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return RATE_LIMIT_DEFAULT_BACKOFF
+
+def throttle_host(limiter, delay):
+    """Pause every queued caller for the host and empty its bucket after a 429"""
+    with limiter["cond"]:
+        limiter["blocked_until"] = max(limiter["blocked_until"], time.monotonic() + delay)
+        limiter["tokens"] = min(limiter["tokens"], 0.0)
+        limiter["cond"].notify_all()
+
+def rate_limiter_table():
+    """One row per host for the metrics panel"""
+    rows = []
+    with RATE_LIMITERS["lock"]:
+        limiters = list(RATE_LIMITERS["hosts"].values())
+    for limiter in limiters:
+        with limiter["cond"]:
+            rows.append({
+                "Host": limiter["host"],
+                "Rate (req/s)": limiter["rate"] or "∞",
+                "Concurrency": limiter["max_in_flight"] or "∞",
+                "In Flight": limiter["in_flight"],
+                "Queued": len(limiter["queue"]),
+                "Paused (s)": round(max(limiter["blocked_until"] - time.monotonic(), 0.0), 1),
+            })
+    return rows
+
+def resolve_endpoint_name(url):
+    """Map a request URL back to its API_ENDPOINTS name (or OPENAI)"""
+    if url.startswith(OPENAI_API_ENDPOINT):
+        return "OPENAI"
+    path = url.split("?", 1)[0]
+    for name, base in API_ENDPOINTS.items():
+        if path == base or path.startswith(base + "/"):
+            return name
+    return "OTHER"
+
+@st.cache_resource
+def get_api_metrics():
+    """Process-wide per-endpoint latency/error counters"""
+    return {"lock": threading.Lock(), "endpoints": {}, "started_at": time.time()}
+
+API_METRICS = get_api_metrics()
+
+def endpoint_metrics(name):
+    """Counters for one endpoint name (caller holds the metrics lock)"""
+    metrics = API_METRICS["endpoints"].get(name)
+    if metrics is None:
+        metrics = API_METRICS["endpoints"][name] = {
+            "requests": 0,
+            "status_codes": Counter(),
+            "timeouts": 0,
+            "connection_errors": 0,
+            "retries": 0,
+            "queue_wait_sum": 0.0,
+            "queue_timeouts": 0,
+            "dedup_requests": 0,
+            "dedup_hits": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+            "latency_buckets": [0] * len(LATENCY_BUCKETS),
+            "latency_sum": 0.0,
+        }
+    return metrics
+
+def record_api_call(url, latency, status_code=None, outcome="ok", bytes_sent=0, bytes_received=0):
+    """Record one upstream call under its API_ENDPOINTS name"""
+    with API_METRICS["lock"]:
+        metrics = endpoint_metrics(resolve_endpoint_name(url))
+        metrics["requests"] += 1
+        metrics["latency_sum"] += latency
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                metrics["latency_buckets"][i] += 1
+                break
+        if status_code is not None:
+            metrics["status_codes"][status_code] += 1
+        if outcome == "timeout":
+            metrics["timeouts"] += 1
+        elif outcome == "error":
+            metrics["connection_errors"] += 1
+        metrics["bytes_sent"] += bytes_sent
+        metrics["bytes_received"] += bytes_received
+
+def record_api_retry(url):
+    with API_METRICS["lock"]:
+        endpoint_metrics(resolve_endpoint_name(url))["retries"] += 1
+
+def record_rate_wait(url, waited, timed_out=False):
+    with API_METRICS["lock"]:
+        metrics = endpoint_metrics(resolve_endpoint_name(url))
+        metrics["queue_wait_sum"] += waited
+        if timed_out:
+            metrics["queue_timeouts"] += 1
+
+def record_single_flight(url, shared):
+    with API_METRICS["lock"]:
+        metrics = endpoint_metrics(resolve_endpoint_name(url))
+        metrics["dedup_requests"] += 1
+        if shared:
+            metrics["dedup_hits"] += 1
+
+def request_body_size(response):
+    body = response.request.body if response.request is not None else None
+    return len(body) if body else 0
+
+def connection_never_opened(error):
+    """True if a requests ConnectionError failed before the connection was open, so nothing was sent"""
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def send_rate_limited(method, url, headers, timeout, timing=None, **kwargs):
+    """Send through the host's limiter, waiting out 429 Retry-After; returns (response, error)"""
+    # Seconds spent queued are added to timing["queue_wait"] when the caller passes a timing dict
+    limiter = get_rate_limiter(url)
+    for attempt in range(RATE_LIMIT_MAX_THROTTLED + 1):
+        waited = acquire_rate_slot(limiter)
+        if timing is not None:
+            timing["queue_wait"] = timing.get("queue_wait", 0.0) + (RATE_LIMIT_MAX_WAIT if waited is None else waited)
+        if waited is None:
+            record_rate_wait(url, RATE_LIMIT_MAX_WAIT, timed_out=True)
+            return None, f"Rate limited: no request slot for {limiter['host']} within {RATE_LIMIT_MAX_WAIT}s"
+        record_rate_wait(url, waited)
+        
+        started = time.perf_counter()
+        try:
+            response = get_http_session(url).request(method, url, headers=headers, timeout=timeout, **kwargs)
+        except requests.exceptions.ConnectTimeout:
+            record_api_call(url, time.perf_counter() - started, outcome="timeout")
+            return None, f"Could not connect: connection to {limiter['host']} timed out"
+        except requests.exceptions.Timeout:
+            record_api_call(url, time.perf_counter() - started, outcome="timeout")
+            return None, "Request timeout. Please try again."
+        except requests.exceptions.ConnectionError as e:
+            record_api_call(url, time.perf_counter() - started, outcome="error")
+            if connection_never_opened(e):
+                return None, f"Could not connect: {str(e)}"
+            return None, f"Connection Error: {str(e)}"
+        except Exception as e:
+            record_api_call(url, time.perf_counter() - started, outcome="error")
+            return None, f"Connection Error: {str(e)}"
+        finally:
+            release_rate_slot(limiter)
+        
+        # Streamed responses are timed to their headers; the body is read by the caller
+        received = 0 if kwargs.get("stream") else len(response.content)
+        record_api_call(url, time.perf_counter() - started, response.status_code,
+                        bytes_sent=request_body_size(response), bytes_received=received)
+        if response.status_code != 429 or attempt == RATE_LIMIT_MAX_THROTTLED:
+            return response, None
+        throttle_host(limiter, retry_after_seconds(response))
+        response.close()
+        record_api_retry(url)
+
+@st.cache_resource
+def get_inflight_calls():
+    """Process-wide single-flight table: calls currently in flight, keyed by request identity"""
+    return {"lock": threading.Lock(), "calls": {}}
+
+INFLIGHT_CALLS = get_inflight_calls()
+
+def single_flight_key(method, url, headers, kwargs):
+    """Identity of an idempotent request (method, URL, params, credentials), or None if it must not be shared"""
+    method = method.upper()
+    if method not in SINGLE_FLIGHT_METHODS or set(kwargs) - {"params"}:
+        return None
+    identity = json.dumps([method, url, kwargs.get("params"), sorted((headers or {}).items())],
+                          sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+def safe_api_call(method, url, headers, timeout=None, coalesce=True, timing=None, **kwargs):
+    """Rate-limited API call wrapper with error handling; identical concurrent GETs share one call"""
+    # A shared result is handed to every waiter as-is, so callers treat results as read-only
+    key = single_flight_key(method, url, headers, kwargs) if coalesce else None
+    if key is None:
+        return perform_api_call(method, url, headers, timeout, timing=timing, **kwargs)
     
-    .matrix-subheader {
-        font-family: 'Share Tech Mono', monospace;
-        font-size: 1.2rem;
-        color: #39ff14;
-        text-align: center;
-        margin-bottom: 3rem;
-        text-shadow: 0 0 5px #39ff14;
-        letter-spacing: 3px;
-    }
+    with INFLIGHT_CALLS["lock"]:
+        call = INFLIGHT_CALLS["calls"].get(key)
+        leader = call is None
+        if leader:
+            call = INFLIGHT_CALLS["calls"][key] = {
+                "done": threading.Event(),
+                "result": (None, "Connection Error: shared request failed"),
+            }
+    record_single_flight(url, shared=not leader)
+    if not leader:
+        call["done"].wait()
+        return call["result"]
+    
+    try:
+        call["result"] = perform_api_call(method, url, headers, timeout, timing=timing, **kwargs)
+    finally:
+        with INFLIGHT_CALLS["lock"]:
+            INFLIGHT_CALLS["calls"].pop(key, None)
+        call["done"].set()
+    return call["result"]
 
-    /* Card/Container Styling */
-    .matrix-card {
-        background: rgba(0, 20, 0, 0.85);
-        border: 2px solid #00ff41;
-        border-radius: 8px;
-        padding: 25px;
-        margin: 15px 0;
-        box-shadow: 
-            0 0 20px rgba(0, 255, 65, 0.3),
-            inset 0 0 20px rgba(0, 255, 65, 0.1);
-        position: relative;
-        overflow: hidden;
-    }
+def perform_api_call(method, url, headers, timeout=None, timing=None, **kwargs):
+    """One upstream call: rate limited, decoded to (result, error)"""
+    if timeout is None:
+        timeout = API_TIMEOUTS.get(resolve_endpoint_name(url), DEFAULT_API_TIMEOUT)
+    response, error = send_rate_limited(method, url, headers, timeout, timing=timing, **kwargs)
+    if error:
+        return None, error
+    if response.status_code in [200, 201]:
+        try:
+            return response.json(), None
+        except ValueError as e:
+            return None, f"Invalid response: {str(e)}"
+    return None, f"Error {response.status_code}: {response.text}"
 
-    .matrix-card::before {
-        content: "";
-        position: absolute;
-        top: -2px;
-        left: -2px;
-        right: -2px;
-        bottom: -2px;
-        background: linear-gradient(45deg, #00ff41, #39ff14, #00ff41);
-        z-index: -1;
-        opacity: 0.3;
-        filter: blur(10px);
-    }
+def is_transient_error(error):
+    """True for errors where the request provably never reached the server: connect failures, queue timeouts, 429 and 503"""
+    if not error:
+        return False
+    return error.startswith(("Could not connect", "Rate limited", "Error 429", "Error 503"))
 
-    /* Status Badges */
-    .status-badge {
-        display: inline-block;
-        padding: 6px 16px;
-        border-radius: 20px;
-        font-size: 0.75rem;
-        font-weight: 700;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        margin: 5px;
-        border: 1px solid;
-        text-shadow: 0 0 5px currentColor;
-    }
+def is_unconfirmed_error(error):
+    """True for errors after the request was sent (read timeouts, dropped connections, undecodable 2xx bodies)"""
+    # Upstream may already have created the job, so these are never retried automatically
+    if not error:
+        return False
+    return error.startswith(("Request timeout", "Connection Error", "Invalid response"))
+
+def post_with_retry(url, headers, payload, max_attempts=MAX_SUBMIT_ATTEMPTS):
+    """POST, retrying only failures that never reached the server, with exponential backoff; returns (result, error, attempts)"""
+    attempts = 0
+    while True:
+        attempts += 1
+        res, err = safe_api_call("POST", url, headers, json=payload)
+        if res or not is_transient_error(err) or attempts >= max_attempts:
+            return res, err, attempts
+        record_api_retry(url)
+        time.sleep(min(2 ** attempts, 30) + random.random())
+
+def write_json_atomic(path, data):
+    """Write JSON via a temp file so a crash never leaves a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def fetch_concurrently(urls, headers):
+    """GET several URLs in parallel, yielding (name, result, error) as each one completes"""
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        futures = {
+            executor.submit(safe_api_call, "GET", url, headers): name
+            for name, url in urls.items()
+        }
+        for future in as_completed(futures):
+            result, error = future.result()
+            yield futures[future], result, error
+
+def build_script_payload(prompt, script_type="general", tone="professional", length="medium"):
+    """Build the chat completion request for a script"""
     
-    .status-pending {
-        background: rgba(255, 255, 0, 0.1);
-        color: #ffff00;
-        border-color: #ffff00;
-        box-shadow: 0 0 10px rgba(255, 255, 0, 0.5);
+    length_guidelines = {
+        "short": "Keep the script under 100 words, concise and impactful.",
+        "medium": "Create a script between 100-300 words, well-balanced and engaging.",
+        "long": "Develop a comprehensive script between 300-500 words with detailed content.",
+        "extra_long": "Write an extensive script of 500-1000 words with in-depth coverage."
     }
     
-    .status-completed {
-        background: rgba(0, 255, 65, 0.1);
-        color: #00ff41;
-        border-color: #00ff41;
-        box-shadow: 0 0 10px rgba(0, 255, 65, 0.5);
+    system_prompts = {
+        "general": "You are a professional script writer for AI avatar videos. Create engaging, natural-sounding scripts.",
+        "marketing": "You are an expert marketing copywriter. Create persuasive, compelling scripts that drive action.",
+        "educational": "You are an educational content creator. Write clear, informative scripts that teach effectively.",
+        "storytelling": "You are a master storyteller. Create engaging narratives with emotional resonance.",
+        "technical": "You are a technical writer. Create clear, accurate scripts explaining complex concepts simply.",
+        "entertainment": "You are an entertainment writer. Create fun, engaging, and entertaining content.",
+        "news": "You are a news reporter. Write factual, balanced, and informative news scripts.",
+        "motivational": "You are a motivational speaker. Create inspiring, uplifting scripts that energize audiences."
     }
     
-    .status-processing {
-        background: rgba(0, 191, 255, 0.1);
-        color: #00bfff;
-        border-color: #00bfff;
-        box-shadow: 0 0 10px rgba(0, 191, 255, 0.5);
-        animation: pulse 2s infinite;
+    payload = {
+        "model": "gpt-4",
+        "messages": [
+            {
+                "role": "system",
+                "content": f"{system_prompts.get(script_type, system_prompts['general'])} The tone should be {tone}. {length_guidelines.get(length, length_guidelines['medium'])}"
+            },
+            {
+                "role": "user",
+                "content": f"Create a script for an AI avatar video based on this topic: {prompt}\n\nMake it natural, conversational, and suitable for video narration."
+            }
+        ],
+        "temperature": 0.7,
+        "max_tokens": 2000
     }
+    return payload
+
+@st.cache_resource
+def get_script_cache():
+    """Process-wide LRU of generated scripts, keyed by request payload hash"""
+    entries = OrderedDict()
+    if os.path.exists(SCRIPT_CACHE_PATH):
+        try:
+            with open(SCRIPT_CACHE_PATH) as f:
+                entries.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    return {"lock": threading.Lock(), "entries": entries}
+
+SCRIPT_CACHE = get_script_cache()
+
+def script_cache_key(payload):
+    """Content address of a request payload"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def script_cache_get(payload):
+    with SCRIPT_CACHE["lock"]:
+        key = script_cache_key(payload)
+        if key not in SCRIPT_CACHE["entries"]:
+            return None
+        SCRIPT_CACHE["entries"].move_to_end(key)
+        return SCRIPT_CACHE["entries"][key]
+
+def script_cache_put(payload, content):
+    """Store a script, evict least recently used entries over the cap, persist to disk"""
+    with SCRIPT_CACHE["lock"]:
+        entries = SCRIPT_CACHE["entries"]
+        entries[script_cache_key(payload)] = content
+        entries.move_to_end(script_cache_key(payload))
+        while len(entries) > SCRIPT_CACHE_MAX_ENTRIES:
+            entries.popitem(last=False)
+        write_json_atomic(SCRIPT_CACHE_PATH, entries)
+
+def request_script_drafts(payload, headers, force=False):
+    """Run one chat completion (n >= 1 choices) through the script cache; returns (drafts, error)"""
+    if not force:
+        cached = script_cache_get(payload)
+        if cached is not None:
+            return (cached if isinstance(cached, list) else [cached]), None
     
-    .status-failed {
-        background: rgba(255, 0, 0, 0.1);
-        color: #ff0000;
-        border-color: #ff0000;
-        box-shadow: 0 0 10px rgba(255, 0, 0, 0.5);
-    }
+    result, error = safe_api_call("POST", OPENAI_API_ENDPOINT, headers, json=payload)
+    
+    if result:
+        drafts = [choice['message']['content'] for choice in result['choices']]
+        script_cache_put(payload, drafts if payload.get("n", 1) > 1 else drafts[0])
+        return drafts, None
+    else:
+        return None, error
 
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.6; }
-    }
+def generate_script_with_openai(prompt, script_type="general", tone="professional", length="medium", force=False):
+    """Generate script using OpenAI API (repeat requests are served from the script cache)"""
+    payload = build_script_payload(prompt, script_type, tone, length)
+    drafts, error = request_script_drafts(payload, get_openai_headers(), force)
+    return (drafts[0], None) if drafts else (None, error)
 
-    /* Button Styling */
-    .stButton > button {
-        background: linear-gradient(135deg, #001a00 0%, #003300 100%);
-        color: #00ff41;
-        border: 2px solid #00ff41;
-        border-radius: 8px;
-        padding: 12px 30px;
-        font-family: 'Orbitron', monospace;
-        font-weight: 700;
-        font-size: 0.95rem;
-        text-transform: uppercase;
-        letter-spacing: 2px;
-        box-shadow: 0 0 15px rgba(0, 255, 65, 0.4);
-        transition: all 0.3s ease;
-        cursor: pointer;
-    }
+def generate_script_variants(prompt, variants, length, headers, force=False):
+    """Request drafts for several (script_type, tone) configs concurrently.
     
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #003300 0%, #004d00 100%);
-        box-shadow: 0 0 25px rgba(0, 255, 65, 0.8);
-        transform: translateY(-2px);
-        border-color: #39ff14;
-    }
+    Identical configs share one request using the API's `n` parameter.
+    Yields ((script_type, tone), drafts, error) as each request completes.
+    """
+    groups = Counter(variants)
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        futures = {}
+        for (script_type, tone), count in groups.items():
+            payload = build_script_payload(prompt, script_type, tone, length)
+            if count > 1:
+                payload["n"] = count
+            futures[executor.submit(request_script_drafts, payload, headers, force)] = (script_type, tone)
+        for future in as_completed(futures):
+            drafts, error = future.result()
+            yield futures[future], drafts, error
 
-    .stButton > button:active {
-        transform: translateY(0);
-        box-shadow: 0 0 10px rgba(0, 255, 65, 0.6);
-    }
+# ==========================================
+# JOB PROGRESS TRACKING
+# ==========================================
+JOB_POLL_INTERVAL = 3  # seconds between status checks of an in-flight job
 
-    /* Input Fields */
-    .stTextInput input, .stTextArea textarea, .stSelectbox select {
-        background-color: rgba(0, 20, 0, 0.8) !important;
-        color: #00ff41 !important;
-        border: 1px solid #00ff41 !important;
-        border-radius: 5px;
-        font-family: 'Share Tech Mono', monospace !important;
-        box-shadow: inset 0 0 10px rgba(0, 255, 65, 0.2);
-    }
+# Approximate progress shown for each reported job status
+JOB_STATUS_PROGRESS = {
+    "queued": 0.05,
+    "pending": 0.1,
+    "processing": 0.5,
+    "rendering": 0.75,
+    "completed": 1.0,
+    "failed": 1.0,
+}
+TERMINAL_JOB_STATUSES = {"completed", "failed", "error", "cancelled"}
 
-    .stTextInput input:focus, .stTextArea textarea:focus {
-        border-color: #39ff14 !important;
-        box-shadow: 0 0 15px rgba(0, 255, 65, 0.5) !important;
-    }
+def job_status_url(kind, project_id):
+    """Status URL for a submitted job: clips live on GENERATE_CLIP, dubbing/lipsync on PROJECT"""
+    base = API_ENDPOINTS["GENERATE_CLIP"] if kind == "clip" else API_ENDPOINTS["PROJECT"]
+    return f"{base}/{project_id}"
 
-    /* Sidebar Styling */
-    section[data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #000000 0%, #001a00 100%);
-        border-right: 2px solid #00ff41;
-        box-shadow: 5px 0 20px rgba(0, 255, 65, 0.3);
+def register_job(project_id, kind, label):
+    """Start tracking a freshly submitted job in this session"""
+    track_project(project_id, kind, notified=webhook_callback_url() is not None)
+    st.session_state.active_jobs[project_id] = {
+        "id": project_id,
+        "kind": kind,
+        "label": label,
+        "status": "Pending",
+        "progress": JOB_STATUS_PROGRESS["pending"],
+        "submitted_at": time.time(),
+        "error": None,
     }
 
-    section[data-testid="stSidebar"] .block-container {
-        padding-top: 2rem;
-    }
+def apply_job_status(job, res):
+    """Update a tracked job from a status response"""
+    job["status"] = res.get('status', job["status"])
+    job["progress"] = JOB_STATUS_PROGRESS.get(job["status"].lower(), job["progress"])
+    # Prefer a server-reported percentage when the endpoint provides one
+    if isinstance(res.get('progress'), (int, float)):
+        job["progress"] = max(0.0, min(float(res['progress']) / 100, 1.0))
+    if job["status"].lower() in TERMINAL_JOB_STATUSES:
+        job["progress"] = 1.0
+    if res.get('videoUrl'):
+        job["video_url"] = res['videoUrl']
 
-    /* Custom Divider */
-    hr {
-        border: none;
-        height: 2px;
-        background: linear-gradient(90deg, transparent, #00ff41, transparent);
-        margin: 2rem 0;
-        box-shadow: 0 0 10px rgba(0, 255, 65, 0.5);
-    }
+def status_check_error(job):
+    """Tracker text for a job whose latest status check failed"""
+    return f"Last status check failed: {job['error']}" if job.get("error") else ""
 
-    /* Tab Styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 10px;
-        background-color: rgba(0, 20, 0, 0.5);
-        border-radius: 8px;
-        padding: 10px;
-    }
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_job_tracker(kind):
+    """Live progress for this session's jobs of one kind; reruns on its own timer"""
+    jobs = [j for j in st.session_state.active_jobs.values() if j["kind"] == kind]
+    if not jobs:
+        return
+    
+    drain_status_updates()
+    
+    st.markdown("#### 📡 JOB TRACKER")
+    for job in sorted(jobs, key=lambda j: j["submitted_at"], reverse=True):
+        elapsed = int(time.time() - job["submitted_at"])
+        st.progress(job["progress"], text=f"{job['label']} · `{job['id']}` · {job['status']} · {elapsed}s")
+        if job.get("error"):
+            st.caption(f"⚠️ {status_check_error(job)}")
 
-    .stTabs [data-baseweb="tab"] {
-        background-color: rgba(0, 20, 0, 0.8);
-        border: 1px solid #00ff41;
-        color: #00ff41;
-        border-radius: 5px;
-        padding: 10px 20px;
-        font-family: 'Orbitron', monospace;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
+# ==========================================
+# PROJECT STORE
+# ==========================================
+PROJECT_DB_PATH = os.path.join(DATA_DIR, "projects.db")
 
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #003300, #004d00);
-        box-shadow: 0 0 15px rgba(0, 255, 65, 0.6);
-        color: #39ff14;
-    }
+@st.cache_resource
+def get_project_store():
+    """Process-wide SQLite store of project history, shared by every session"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    conn = sqlite3.connect(PROJECT_DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS projects (
+            key_fp TEXT NOT NULL,
+            id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_date TEXT NOT NULL,
+            updated_date TEXT NOT NULL,
+            actor_id TEXT,
+            voice_id TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (key_fp, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (key_fp, status, created_date);
+        CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (key_fp, created_date);
+        CREATE INDEX IF NOT EXISTS idx_projects_updated ON projects (key_fp, updated_date);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key_fp TEXT PRIMARY KEY,
+            tail_cursor TEXT,
+            complete INTEGER NOT NULL DEFAULT 0,
+            head_gaps TEXT
+        );
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(sync_state)")}
+    if "head_gaps" not in columns:
+        conn.execute("ALTER TABLE sync_state ADD COLUMN head_gaps TEXT")
+    return {"lock": threading.Lock(), "conn": conn, "versions": {}}
 
-    /* Expander Styling */
-    .streamlit-expanderHeader {
-        background-color: rgba(0, 20, 0, 0.8) !important;
-        border: 1px solid #00ff41 !important;
-        border-radius: 5px;
-        color: #00ff41 !important;
-        font-family: 'Orbitron', monospace;
-    }
+PROJECT_STORE = get_project_store()
 
-    /* Success/Error/Warning Messages */
-    .stSuccess, .stError, .stWarning, .stInfo {
-        background-color: rgba(0, 20, 0, 0.9) !important;
-        border-left: 4px solid #00ff41 !important;
-        color: #00ff41 !important;
-        font-family: 'Share Tech Mono', monospace;
-    }
+def store_version(fp):
+    """Bumped whenever a write changes rows for this key; used as a cache key"""
+    return PROJECT_STORE["versions"].get(fp, 0)
 
-    .stError {
-        border-left-color: #ff0000 !important;
-        color: #ff0000 !important;
-    }
+def store_upsert(fp, items):
+    """Insert new projects and update only rows whose updatedDate or status changed"""
+    rows = [(
+        fp,
+        item['id'],
+        item.get('status', 'Unknown').lower(),
+        item.get('createdDate', ''),
+        item.get('updatedDate', ''),
+        item.get('actorId'),
+        item.get('voiceId'),
+        json.dumps(item),
+    ) for item in items if item.get('id')]
+    if not rows:
+        return 0
+    with PROJECT_STORE["lock"]:
+        conn = PROJECT_STORE["conn"]
+        before = conn.total_changes
+        conn.executemany("""
+            INSERT INTO projects (key_fp, id, status, created_date, updated_date, actor_id, voice_id, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key_fp, id) DO UPDATE SET
+                status = excluded.status,
+                updated_date = excluded.updated_date,
+                actor_id = excluded.actor_id,
+                voice_id = excluded.voice_id,
+                data = excluded.data
+            WHERE excluded.updated_date > projects.updated_date OR excluded.status != projects.status
+        """, rows)
+        conn.commit()
+        changed = conn.total_changes - before
+        if changed:
+            PROJECT_STORE["versions"][fp] = store_version(fp) + 1
+    return changed
 
-    .stWarning {
-        border-left-color: #ffff00 !important;
-        color: #ffff00 !important;
-    }
+def store_unchanged(fp, items):
+    """True when every item is already stored with the same updatedDate"""
+    ids = [item.get('id') for item in items]
+    with PROJECT_STORE["lock"]:
+        stored = dict(PROJECT_STORE["conn"].execute(
+            f"SELECT id, updated_date FROM projects WHERE key_fp = ? AND id IN ({','.join('?' * len(ids))})",
+            [fp, *ids]
+        ).fetchall()) if ids else {}
+    return all(stored.get(item.get('id')) == item.get('updatedDate', '') for item in items)
+
+def store_sync_state(fp):
+    """(cursor of the oldest page not yet stored, whether the tail has been fully synced, head gap cursors)"""
+    # Head gaps are where interrupted walks of newer pages stopped, shallowest first
+    with PROJECT_STORE["lock"]:
+        row = PROJECT_STORE["conn"].execute(
+            "SELECT tail_cursor, complete, head_gaps FROM sync_state WHERE key_fp = ?", (fp,)
+        ).fetchone()
+    if row is None:
+        return None, False, []
+    return (json.loads(row[0]) if row[0] else None), bool(row[1]), (json.loads(row[2]) if row[2] else [])
+
+def store_save_sync_state(fp, tail_cursor, complete, head_gaps, loader=None):
+    """Save sync progress, unless it comes from a loader that a newer sync has cancelled"""
+    with PROJECT_STORE["lock"]:
+        if loader is not None and loader["cancelled"]:
+            return
+        PROJECT_STORE["conn"].execute("""
+            INSERT INTO sync_state (key_fp, tail_cursor, complete, head_gaps) VALUES (?, ?, ?, ?)
+            ON CONFLICT (key_fp) DO UPDATE SET
+                tail_cursor = excluded.tail_cursor,
+                complete = excluded.complete,
+                head_gaps = excluded.head_gaps
+        """, (fp, json.dumps(tail_cursor) if tail_cursor is not None else None, int(complete),
+              json.dumps(head_gaps) if head_gaps else None))
+        PROJECT_STORE["conn"].commit()
+
+def store_status_counts(fp):
+    """Project count per (lowercase) status"""
+    with PROJECT_STORE["lock"]:
+        return dict(PROJECT_STORE["conn"].execute(
+            "SELECT status, COUNT(*) FROM projects WHERE key_fp = ? GROUP BY status", (fp,)
+        ).fetchall())
+
+def store_query(fp, status_filter="All", sort_by="Newest First", limit=None, offset=0):
+    """One page of projects, filtered and sorted by the indexed columns"""
+    sql = "SELECT data FROM projects WHERE key_fp = ?"
+    params = [fp]
+    if status_filter != "All":
+        sql += " AND status = ?"
+        params.append(status_filter.lower())
+    sql += {
+        "Newest First": " ORDER BY created_date DESC",
+        "Oldest First": " ORDER BY created_date ASC",
+        "Status": " ORDER BY status, created_date DESC",
+    }[sort_by]
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with PROJECT_STORE["lock"]:
+        return [json.loads(row[0]) for row in PROJECT_STORE["conn"].execute(sql, params)]
+
+def store_count(fp, status_filter="All"):
+    if status_filter == "All":
+        return sum(store_status_counts(fp).values())
+    return store_status_counts(fp).get(status_filter.lower(), 0)
+
+def store_columns(fp):
+    """Analytics columns for every stored project"""
+    with PROJECT_STORE["lock"]:
+        return PROJECT_STORE["conn"].execute(
+            "SELECT id, status, created_date, updated_date, actor_id, voice_id FROM projects WHERE key_fp = ?", (fp,)
+        ).fetchall()
+
+def session_key_fp():
+    return api_key_fingerprint(st.session_state.avatar_api_key)
+
+# ==========================================
+# HISTORY LOADING
+# ==========================================
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_ITEMS = int(os.environ.get("CLONER_HISTORY_MAX_ITEMS", 5000))  # memory bound per session
+HISTORY_SYNC_MAX_ITEMS = int(os.environ.get("CLONER_HISTORY_SYNC_MAX_ITEMS", 100000))  # per sync, into the store
+HISTORY_RERUN_INTERVAL = 3  # seconds between full reruns while older pages stream in
+
+def history_page_url(cursor=None):
+    """URL for one history page; numeric cursors are page numbers, others opaque tokens"""
+    url = f"{API_ENDPOINTS['GENERATE_CLIP']}?pageSize={HISTORY_PAGE_SIZE}"
+    if isinstance(cursor, int):
+        return f"{url}&page={cursor}"
+    if cursor:
+        return f"{url}&cursor={cursor}"
+    return url
+
+def next_history_cursor(data, cursor):
+    """Cursor for the page after `data`, or None when it was the last page"""
+    items = data.get('items', [])
+    token = data.get('nextCursor') or data.get('cursor') or data.get('next')
+    if token and token != cursor:
+        return token
+    if len(items) < HISTORY_PAGE_SIZE:
+        return None
+    return (cursor if isinstance(cursor, int) else 1) + 1
+
+def merge_history(items):
+    """Write items through to the project store and merge them into the session's working set"""
+    store_upsert(session_key_fp(), items)
+    by_id = {h.get('id'): h for h in st.session_state.history}
+    for item in items:
+        by_id[item.get('id')] = item
+    merged = sorted(by_id.values(), key=lambda x: x.get('createdDate', ''), reverse=True)
+    st.session_state.history = merged[:HISTORY_MAX_ITEMS]
+    refresh_history_counters()
+    for item in items:
+        if item.get('id') and item.get('status', '').lower() not in TERMINAL_JOB_STATUSES:
+            track_project(item['id'], "clip")
+
+def refresh_history_counters():
+    """Recompute the sidebar COMPLETED / PROCESSING counters from the project store"""
+    counts = store_status_counts(session_key_fp())
+    st.session_state.total_videos_created = counts.get('completed', 0)
+    st.session_state.processing_videos = counts.get('pending', 0) + counts.get('processing', 0)
+
+def reload_history_from_store():
+    """Replace the session's working set with the newest stored projects"""
+    st.session_state.history = store_query(session_key_fp(), limit=HISTORY_MAX_ITEMS)
+    refresh_history_counters()
+    for item in st.session_state.history:
+        if item.get('status', '').lower() not in TERMINAL_JOB_STATUSES:
+            track_project(item['id'], "clip")
 
-    /* Loading Spinner */
-    .stSpinner > div {
-        border-color: #00ff41 !important;
-        border-right-color: transparent !important;
+def load_stored_history():
+    """Fill an empty session from the local store so the library opens instantly"""
+    if not st.session_state.history:
+        reload_history_from_store()
+
+def stream_history_pages(loader, headers, cursor, fp, sync_state, in_tail):
+    """Loader thread: write new pages to the store until it meets stored ones, then resume the unsynced tail"""
+    # A head walk that meets a stored page continues at the next saved head gap, then the tail;
+    # tail progress is saved per page, and an interrupted head walk saves its cursor as a new gap
+    tail_cursor, complete, head_gaps = sync_state
+    fetched = 0
+    while cursor is not None and not loader["cancelled"]:
+        data, err = safe_api_call("GET", history_page_url(cursor), headers)
+        if err:
+            loader["error"] = err
+            break
+        items = data.get('items', [])
+        known = bool(items) and store_unchanged(fp, items)
+        store_upsert(fp, items)
+        loader["loaded"] += len(items)
+        fetched += len(items)
+        next_cursor = next_history_cursor(data, cursor) if items else None
+        
+        if not in_tail and known:
+            if head_gaps:
+                next_cursor = head_gaps.pop(0)
+            elif complete:
+                cursor = None  # caught up with a fully synced store
+                store_save_sync_state(fp, tail_cursor, complete, head_gaps, loader)
+                break
+            else:
+                in_tail = True
+                next_cursor = tail_cursor if tail_cursor is not None else next_cursor
+        if next_cursor is None:
+            tail_cursor, complete, head_gaps = None, True, []
+        elif in_tail:
+            tail_cursor = next_cursor
+        store_save_sync_state(fp, tail_cursor, complete, head_gaps, loader)
+        cursor = loader["cursor"] = next_cursor
+        loader["in_tail"] = in_tail
+        if fetched >= HISTORY_SYNC_MAX_ITEMS:
+            break
+    if not in_tail and cursor is not None:
+        # Stopped inside new pages: the ones from here on are unverified, so the next sync revisits them
+        store_save_sync_state(fp, tail_cursor, complete, [cursor] + head_gaps, loader)
+    loader["done"] = True
+
+def apply_first_history_page(data, headers):
+    """Show the first page right away and stream the remaining pages in the background"""
+    fp = session_key_fp()
+    items = data.get('items', [])
+    st.session_state.history_error = None
+    first_page_known = store_unchanged(fp, items)
+    merge_history(items)
+    
+    previous = st.session_state.get("history_loader")
+    if previous:
+        previous["cancelled"] = True
+    
+    tail_cursor, complete, head_gaps = store_sync_state(fp)
+    if previous and not previous["done"] and not previous["in_tail"] and previous["cursor"] is not None:
+        # The cancelled loader no longer saves; the newer pages it had not verified become a gap
+        head_gaps = [previous["cursor"]] + [gap for gap in head_gaps if gap != previous["cursor"]]
+    cursor = next_history_cursor(data, None)
+    if cursor is None:
+        store_save_sync_state(fp, None, True, [])
+    # Incremental sync: an unchanged first page means the store is current, but only once no gaps remain
+    if cursor is None or (first_page_known and complete and not head_gaps):
+        st.session_state.history_loader = None
+        return
+    # Walk the new head first; when the head is already stored, go straight to the first gap or the saved tail,
+    # and on the very first sync the head walk is the tail walk
+    in_tail = tail_cursor is None and not complete and not head_gaps
+    if first_page_known and head_gaps:
+        cursor = head_gaps.pop(0)
+    elif first_page_known:
+        cursor, in_tail = tail_cursor, True
+    
+    loader = {"done": False, "cancelled": False, "error": None, "loaded": len(items),
+              "merged": len(items), "merged_at": time.time(), "cursor": cursor, "in_tail": in_tail}
+    st.session_state.history_loader = loader
+    threading.Thread(target=stream_history_pages,
+                     args=(loader, headers, cursor, fp, (tail_cursor, complete, head_gaps), in_tail),
+                     daemon=True, name="history-loader").start()
+
+def load_history(headers):
+    """Fetch the newest history page and start streaming older ones"""
+    data, err = safe_api_call("GET", history_page_url(), headers)
+    if data:
+        apply_first_history_page(data, headers)
+    return err
+
+@st.fragment(run_every=1)
+def render_history_stream_status():
+    """Refresh session history from the store while the loader thread writes older pages into it"""
+    loader = st.session_state.get("history_loader")
+    if not loader:
+        return
+    
+    if loader["done"]:
+        st.session_state.history_loader = None
+        if loader["error"]:
+            st.session_state.history_error = loader["error"]
+        reload_history_from_store()
+        st.rerun(scope="app")
+    elif loader["loaded"] > loader["merged"] and time.time() - loader["merged_at"] >= HISTORY_RERUN_INTERVAL:
+        loader["merged"], loader["merged_at"] = loader["loaded"], time.time()
+        reload_history_from_store()
+        st.rerun(scope="app")
+    
+    st.caption(f"⏳ Streaming older projects... {loader['loaded']} loaded")
+
+# ==========================================
+# STATUS POLLER
+# ==========================================
+POLL_MIN_INTERVAL = 2  # first checks of a new project
+POLL_MAX_INTERVAL = 60  # ceiling for long renders
+POLL_BACKOFF = 1.5  # interval growth per unchanged check
+POLL_BATCH_SIZE = 10  # status GETs issued concurrently per sweep
+POLL_IDLE_EXIT = 30  # seconds with nothing to track before the thread exits
+
+def get_status_poller():
+    """This session's poller state, shared with its background thread"""
+    if st.session_state.get("status_poller") is None:
+        st.session_state.status_poller = {
+            "lock": threading.Lock(),
+            "tracked": {},
+            "updates": [],
+            "headers": {},
+            "thread": None,
+        }
+    return st.session_state.status_poller
+
+def track_project(project_id, kind, notified=False):
+    """Add an in-flight project to the poller (no-op if already tracked); notified ones wait for a webhook first"""
+    poller = get_status_poller()
+    with poller["lock"]:
+        if project_id in poller["tracked"]:
+            return
+        first_check = WEBHOOK_FALLBACK_AFTER if notified else POLL_MIN_INTERVAL
+        poller["tracked"][project_id] = {
+            "url": job_status_url(kind, project_id),
+            "status": None,
+            "interval": POLL_MIN_INTERVAL,
+            "next_check": time.time() + first_check,
+            "notified": notified,
+            "error": None,
+        }
+    if notified:
+        subscribe_webhook(project_id, lambda res: apply_webhook_status(poller, project_id, res))
+
+def next_poll_interval(entry, changed):
+    """Adaptive backoff: reset on a status change, otherwise grow towards the ceiling"""
+    if changed:
+        return POLL_MIN_INTERVAL
+    return min(entry["interval"] * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+def record_tracked_status(poller, project_id, entry, res, error=None):
+    """Store a reported status or check error and queue it for the session (caller holds the lock); returns whether the status changed"""
+    status = res.get('status') if res else entry["status"]
+    changed = status != entry["status"]
+    entry["status"] = status
+    error_changed = error != entry["error"]
+    entry["error"] = error
+    if (res and changed) or error_changed:
+        poller["updates"].append((project_id, res if changed else None, error))
+    if (status or "").lower() in TERMINAL_JOB_STATUSES:
+        del poller["tracked"][project_id]
+        if entry.get("notified"):
+            unsubscribe_webhook(project_id)
+    return changed
+
+def poll_due_projects(poller):
+    """Check every project that is due, POLL_BATCH_SIZE at a time"""
+    now = time.time()
+    with poller["lock"]:
+        due = {pid: e["url"] for pid, e in poller["tracked"].items() if e["next_check"] <= now}
+        fallback = sum(1 for pid in due if poller["tracked"][pid].get("notified"))
+    if fallback:
+        record_webhook_event("fallback_polls", fallback)
+    due_ids = list(due)
+    for start in range(0, len(due_ids), POLL_BATCH_SIZE):
+        chunk = {pid: due[pid] for pid in due_ids[start:start + POLL_BATCH_SIZE]}
+        for pid, res, err in fetch_concurrently(chunk, poller["headers"]):
+            with poller["lock"]:
+                entry = poller["tracked"].get(pid)
+                if entry is None:
+                    continue
+                changed = record_tracked_status(poller, pid, entry, res, err)
+                entry["interval"] = next_poll_interval(entry, changed)
+                entry["next_check"] = time.time() + entry["interval"]
+
+def status_poller_loop(poller):
+    """Poller thread: sweep due projects until nothing has been tracked for a while"""
+    idle_since = None
+    while True:
+        with poller["lock"]:
+            tracked = bool(poller["tracked"])
+            if not tracked and idle_since and time.time() - idle_since > POLL_IDLE_EXIT:
+                poller["thread"] = None
+                return
+        if tracked:
+            idle_since = None
+            poll_due_projects(poller)
+        elif idle_since is None:
+            idle_since = time.time()
+        time.sleep(1)
+
+def ensure_status_poller(headers):
+    """Start this session's poller thread if it is not running"""
+    poller = get_status_poller()
+    with poller["lock"]:
+        poller["headers"] = headers
+        if poller["thread"] is not None or not poller["tracked"]:
+            return
+        poller["thread"] = threading.Thread(target=status_poller_loop, args=(poller,), daemon=True, name="status-poller")
+    poller["thread"].start()
+
+def drain_status_updates():
+    """Apply status changes found by the poller to history and tracked jobs"""
+    poller = get_status_poller()
+    with poller["lock"]:
+        updates, poller["updates"] = poller["updates"], []
+    if not updates:
+        return False
+    
+    history_by_id = {h.get('id'): h for h in st.session_state.history}
+    changed_items = []
+    for pid, res, error in updates:
+        job = st.session_state.active_jobs.get(pid)
+        if job:
+            job["error"] = error
+            if res:
+                apply_job_status(job, res)
+        if res and pid in history_by_id:
+            changed_items.append({**history_by_id[pid], **res})
+    if changed_items:
+        merge_history(changed_items)
+    return True
+
+@st.fragment(run_every=2)
+def render_neural_metrics():
+    """Sidebar counters, kept current by the poller without full-page reruns"""
+    if st.session_state.avatar_api_key:
+        ensure_status_poller(get_avatar_headers())
+        # A background catalog refresh finished: pick it up everywhere
+        if apply_cached_catalog():
+            st.rerun(scope="app")
+    drain_status_updates()
+    
+    catalog = session_catalog()
+    if catalog["avatars"]:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("👤 AVATARS", len(catalog["avatars"]))
+            st.metric("📹 COMPLETED", st.session_state.total_videos_created)
+        with col2:
+            st.metric("🎤 VOICES", len(catalog["voices"]))
+            st.metric("⚙️ PROCESSING", st.session_state.processing_videos)
+        
+        if st.session_state.sync_time:
+            st.caption(f"Last sync: {st.session_state.sync_time}")
+    else:
+        st.info("🔌 No data loaded. Click SYNC to connect.")
+
+# ==========================================
+# WEBHOOK RECEIVER
+# ==========================================
+# Optional embedded endpoint that upstream POSTs job notifications to, so
+# completion is seen the moment it happens instead of on the next poll.
+# Enabled by CLONER_WEBHOOK_PORT together with CLONER_WEBHOOK_URL, the base
+# address upstream reaches it at (e.g. a reverse proxy in front of the port).
+# It listens on loopback unless CLONER_WEBHOOK_BIND says otherwise, which
+# also requires CLONER_WEBHOOK_SECRET.
+WEBHOOK_PORT = int(os.environ.get("CLONER_WEBHOOK_PORT", 0))
+WEBHOOK_BIND = os.environ.get("CLONER_WEBHOOK_BIND", "127.0.0.1")
+WEBHOOK_URL = os.environ.get("CLONER_WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = "/webhook/job"
+WEBHOOK_SECRET = os.environ.get("CLONER_WEBHOOK_SECRET", "")  # sent back as ?token= in the callback URL
+WEBHOOK_FALLBACK_AFTER = int(os.environ.get("CLONER_WEBHOOK_FALLBACK", 300))  # seconds without a callback before polling resumes
+WEBHOOK_MAX_BODY = 1024 * 1024
+WEBHOOK_UNCLAIMED_MAX = 1000  # notifications kept for jobs not subscribed yet
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Accepts POST WEBHOOK_PATH with a project JSON body and hands it to the job's subscribers"""
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != WEBHOOK_PATH:
+            return self.reply(404, {"error": "Unknown path"})
+        token = parse_qs(url.query).get("token", [""])[0]
+        if WEBHOOK_SECRET and not hmac.compare_digest(token, WEBHOOK_SECRET):
+            record_webhook_event("rejected")
+            return self.reply(403, {"error": "Invalid token"})
+        length = self.headers.get("Content-Length") or "0"
+        if not (length.isascii() and length.isdigit()):
+            record_webhook_event("rejected")
+            return self.reply(400, {"error": "Invalid Content-Length"})
+        length = int(length)
+        if length > WEBHOOK_MAX_BODY:
+            record_webhook_event("rejected")
+            return self.reply(413, {"error": "Body too large"})
+        try:
+            res = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            res = None
+        project_id = (res.get('id') or res.get('projectId')) if isinstance(res, dict) else None
+        if not project_id:
+            record_webhook_event("rejected")
+            return self.reply(400, {"error": "Expected a JSON project with an id"})
+        self.reply(200, {"delivered": deliver_webhook(project_id, res)})
+
+def is_loopback_host(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+def webhook_config_error():
+    """Why the receiver must stay off, or None when it may start"""
+    if not WEBHOOK_URL:
+        return "Webhook receiver off: set CLONER_WEBHOOK_URL to the address upstream can reach it at"
+    if not WEBHOOK_SECRET and not is_loopback_host(WEBHOOK_BIND):
+        return f"Webhook receiver off: binding {WEBHOOK_BIND} requires CLONER_WEBHOOK_SECRET"
+    return None
+
+@st.cache_resource
+def get_webhook_receiver():
+    """Process-wide callback server and its subscriptions; the server is None when off, misconfigured or the port is taken"""
+    receiver = {
+        "lock": threading.Lock(),
+        "server": None,
+        "error": None,
+        "subscribers": {},  # project id -> callbacks waiting for its notifications
+        "unclaimed": OrderedDict(),  # notifications that arrived before their job subscribed
+        "counters": Counter(),
+        "last_received_at": None,
     }
+    if not WEBHOOK_PORT:
+        return receiver
+    receiver["error"] = webhook_config_error()
+    if receiver["error"] is None:
+        try:
+            server = ThreadingHTTPServer((WEBHOOK_BIND, WEBHOOK_PORT), WebhookHandler)
+        except OSError as e:
+            receiver["error"] = f"Webhook receiver off: {e}"
+        else:
+            server.daemon_threads = True
+            receiver["server"] = server
+            threading.Thread(target=server.serve_forever, daemon=True, name="webhook-receiver").start()
+    return receiver
+
+WEBHOOK_RECEIVER = get_webhook_receiver()
+
+def webhook_callback_url():
+    """URL to hand upstream as callbackUrl, or None when the receiver is not running"""
+    if WEBHOOK_RECEIVER["server"] is None:
+        return None
+    token = f"?token={quote(WEBHOOK_SECRET)}" if WEBHOOK_SECRET else ""
+    return f"{WEBHOOK_URL}{WEBHOOK_PATH}{token}"
 
-    /* Metrics */
-    [data-testid="stMetricValue"] {
-        color: #00ff41 !important;
-        font-family: 'Orbitron', monospace;
-        font-size: 2rem;
-        text-shadow: 0 0 10px #00ff41;
+def with_webhook(payload):
+    """Ask upstream to notify our receiver about this job, when it is running"""
+    callback_url = webhook_callback_url()
+    return {**payload, "callbackUrl": callback_url} if callback_url else payload
+
+def record_webhook_event(name, count=1):
+    with WEBHOOK_RECEIVER["lock"]:
+        WEBHOOK_RECEIVER["counters"][name] += count
+
+def subscribe_webhook(project_id, callback):
+    """Call callback(result) for every notification about the project until it is terminal"""
+    with WEBHOOK_RECEIVER["lock"]:
+        early = WEBHOOK_RECEIVER["unclaimed"].pop(project_id, None)
+        if early is None or (early.get('status') or "").lower() not in TERMINAL_JOB_STATUSES:
+            WEBHOOK_RECEIVER["subscribers"].setdefault(project_id, []).append(callback)
+    if early is not None:
+        callback(early)
+
+def deliver_webhook(project_id, res):
+    """Hand a notification to the project's subscribers (or park it until one appears); returns how many got it"""
+    terminal = (res.get('status') or "").lower() in TERMINAL_JOB_STATUSES
+    with WEBHOOK_RECEIVER["lock"]:
+        WEBHOOK_RECEIVER["counters"]["received"] += 1
+        WEBHOOK_RECEIVER["last_received_at"] = time.time()
+        callbacks = WEBHOOK_RECEIVER["subscribers"].get(project_id, [])
+        if terminal:
+            WEBHOOK_RECEIVER["subscribers"].pop(project_id, None)
+        if not callbacks:
+            unclaimed = WEBHOOK_RECEIVER["unclaimed"]
+            unclaimed[project_id] = res
+            unclaimed.move_to_end(project_id)
+            while len(unclaimed) > WEBHOOK_UNCLAIMED_MAX:
+                unclaimed.popitem(last=False)
+            WEBHOOK_RECEIVER["counters"]["unclaimed"] += 1
+            return 0
+        WEBHOOK_RECEIVER["counters"]["delivered"] += 1
+    for callback in callbacks:
+        callback(res)
+    return len(callbacks)
+
+def apply_webhook_status(poller, project_id, res):
+    """Webhook subscriber: record the pushed status and postpone the fallback poll"""
+    with poller["lock"]:
+        entry = poller["tracked"].get(project_id)
+        if entry is None:
+            return
+        record_tracked_status(poller, project_id, entry, res)
+        entry["next_check"] = time.time() + WEBHOOK_FALLBACK_AFTER
+
+def unsubscribe_webhook(project_id):
+    with WEBHOOK_RECEIVER["lock"]:
+        WEBHOOK_RECEIVER["subscribers"].pop(project_id, None)
+
+def webhook_summary():
+    """Receiver state and counters for the metrics panel"""
+    with WEBHOOK_RECEIVER["lock"]:
+        counters = dict(WEBHOOK_RECEIVER["counters"])
+        waiting = len(WEBHOOK_RECEIVER["subscribers"])
+        last_received_at = WEBHOOK_RECEIVER["last_received_at"]
+    return {
+        "url": webhook_callback_url(),
+        "error": WEBHOOK_RECEIVER["error"],
+        "waiting": waiting,
+        "last_received_at": last_received_at,
+        **{name: counters.get(name, 0) for name in ("received", "delivered", "unclaimed", "rejected", "fallback_polls")},
     }
 
-    /* Code blocks */
-    code {
-        background-color: rgba(0, 20, 0, 0.8) !important;
-        color: #00ff41 !important;
-        border: 1px solid #00ff41 !important;
-        padding: 2px 6px;
-        border-radius: 3px;
+def webhook_metrics_prometheus(summary):
+    """Webhook counters in Prometheus text exposition format"""
+    lines = []
+    counters = [
+        ("cloner_webhook_received_total", "received", "Job notifications received by the webhook receiver."),
+        ("cloner_webhook_delivered_total", "delivered", "Notifications handed to a subscribed job."),
+        ("cloner_webhook_unclaimed_total", "unclaimed", "Notifications for jobs nobody was waiting on."),
+        ("cloner_webhook_rejected_total", "rejected", "Callbacks refused for a bad token, size or body."),
+        ("cloner_webhook_fallback_polls_total", "fallback_polls", "Status polls of webhook jobs after the callback deadline."),
+    ]
+    for metric, field, help_text in counters:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter", f"{metric} {summary[field]}"]
+    lines += ["# HELP cloner_webhook_waiting Jobs currently waiting for a callback.",
+              "# TYPE cloner_webhook_waiting gauge", f"cloner_webhook_waiting {summary['waiting']}"]
+    return "\n".join(lines) + "\n"
+
+# ==========================================
+# CATALOG CACHE
+# ==========================================
+CATALOG_DIR = os.path.join(DATA_DIR, "catalog")
+CATALOG_RETRY_INTERVAL = 60  # seconds to wait after a failed background refresh
+CATALOG_SYNC_MIN_AGE = 60  # a manual sync reuses a catalog fetched this recently
+CATALOG_WARM_KEYS = [k.strip() for k in os.environ.get("CLONER_WARM_API_KEYS", "").split(",") if k.strip()]
+EMPTY_CATALOG = MappingProxyType({"avatars": (), "voices": (), "fetched_at": None})
+
+def api_key_fingerprint(api_key):
+    """Stable, non-reversible cache key for an API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+@st.cache_resource
+def get_catalog_registry():
+    """Process-wide avatar/voice catalogs keyed by API key fingerprint, shared read-only by all sessions"""
+    return {"lock": threading.Lock(), "entries": {}, "refreshing": set(), "failed_at": {}}
+
+CATALOG_REGISTRY = get_catalog_registry()
+
+def catalog_path(fingerprint):
+    return os.path.join(CATALOG_DIR, f"{fingerprint}.json")
+
+def freeze_catalog_items(items):
+    """Read-only view of catalog items so one copy can be shared by every session"""
+    return tuple(
+        MappingProxyType({k: tuple(v) if isinstance(v, list) else v for k, v in item.items()})
+        for item in items
+    )
+
+def freeze_catalog(entry):
+    return MappingProxyType({
+        "avatars": freeze_catalog_items(entry.get("avatars", [])),
+        "voices": freeze_catalog_items(entry.get("voices", [])),
+        "fetched_at": entry.get("fetched_at"),
+    })
+
+def store_catalog(fingerprint, avatars=None, voices=None):
+    """Update the shared catalog (in memory and on disk) with freshly fetched lists"""
+    with CATALOG_REGISTRY["lock"]:
+        current = CATALOG_REGISTRY["entries"].get(fingerprint) or EMPTY_CATALOG
+        raw = {
+            "avatars": avatars if avatars is not None else [dict(a) for a in current["avatars"]],
+            "voices": voices if voices is not None else [dict(v) for v in current["voices"]],
+            "fetched_at": time.time(),
+        }
+        entry = CATALOG_REGISTRY["entries"][fingerprint] = freeze_catalog(raw)
+        write_json_atomic(catalog_path(fingerprint), raw)
+    return entry
+
+def load_catalog_file(fingerprint):
+    """Shared catalog from its persisted file, or None"""
+    try:
+        with open(catalog_path(fingerprint)) as f:
+            entry = freeze_catalog(json.load(f))
+    except (OSError, ValueError):
+        return None
+    with CATALOG_REGISTRY["lock"]:
+        return CATALOG_REGISTRY["entries"].setdefault(fingerprint, entry)
+
+def refresh_catalog(fingerprint, headers):
+    """Fetch avatars and voices concurrently and store whatever succeeded"""
+    try:
+        urls = {"avatars": API_ENDPOINTS["AVATAR_LIST"], "voices": API_ENDPOINTS["VOICE_LIST"]}
+        fetched = {name: data.get('items', []) for name, data, err in fetch_concurrently(urls, headers) if not err}
+        if fetched:
+            store_catalog(fingerprint, **fetched)
+        if len(fetched) < len(urls):
+            CATALOG_REGISTRY["failed_at"][fingerprint] = time.time()
+    finally:
+        with CATALOG_REGISTRY["lock"]:
+            CATALOG_REGISTRY["refreshing"].discard(fingerprint)
+
+def start_catalog_refresh(fingerprint, headers):
+    """Refresh in the background unless a refresh is running or recently failed"""
+    with CATALOG_REGISTRY["lock"]:
+        recently_failed = time.time() - CATALOG_REGISTRY["failed_at"].get(fingerprint, 0) < CATALOG_RETRY_INTERVAL
+        start_refresh = fingerprint not in CATALOG_REGISTRY["refreshing"] and not recently_failed
+        if start_refresh:
+            CATALOG_REGISTRY["refreshing"].add(fingerprint)
+    if start_refresh:
+        threading.Thread(target=refresh_catalog, args=(fingerprint, headers), daemon=True, name="catalog-refresh").start()
+
+def get_catalog(api_key, headers):
+    """Cached catalog for this key (possibly stale); refreshes in the background when stale"""
+    fingerprint = api_key_fingerprint(api_key)
+    with CATALOG_REGISTRY["lock"]:
+        entry = CATALOG_REGISTRY["entries"].get(fingerprint)
+    
+    if entry is None and os.path.exists(catalog_path(fingerprint)):
+        entry = load_catalog_file(fingerprint)
+    
+    if entry is None or time.time() - entry["fetched_at"] > CATALOG_TTL:
+        start_catalog_refresh(fingerprint, headers)
+    return entry
+
+def fetch_catalog_list(fingerprint, name, headers):
+    """GET one catalog list ("avatars" or "voices") and store it; returns (entry, error)"""
+    url = API_ENDPOINTS["AVATAR_LIST"] if name == "avatars" else API_ENDPOINTS["VOICE_LIST"]
+    data, err = safe_api_call("GET", url, headers)
+    if err:
+        CATALOG_REGISTRY["failed_at"][fingerprint] = time.time()
+        return None, err
+    return store_catalog(fingerprint, **{name: data.get('items', [])}), None
+
+def sync_catalog(api_key, headers, executor):
+    """Manual sync: reuse a catalog fetched in the last CATALOG_SYNC_MIN_AGE seconds, else submit a fetch of each list"""
+    # Returns (cached entry, {future: list name}); call finish_catalog_sync once submitted fetches are done
+    fingerprint = api_key_fingerprint(api_key)
+    entry = get_catalog(api_key, headers)
+    if entry is not None and time.time() - entry["fetched_at"] < CATALOG_SYNC_MIN_AGE:
+        return entry, {}
+    with CATALOG_REGISTRY["lock"]:
+        CATALOG_REGISTRY["refreshing"].add(fingerprint)
+        CATALOG_REGISTRY["failed_at"].pop(fingerprint, None)
+    return entry, {executor.submit(fetch_catalog_list, fingerprint, name, headers): name for name in ("avatars", "voices")}
+
+def finish_catalog_sync(api_key):
+    with CATALOG_REGISTRY["lock"]:
+        CATALOG_REGISTRY["refreshing"].discard(api_key_fingerprint(api_key))
+
+@st.cache_resource
+def warm_catalogs():
+    """Once per process: load every persisted catalog and refresh CLONER_WARM_API_KEYS in the background"""
+    if os.path.isdir(CATALOG_DIR):
+        for name in os.listdir(CATALOG_DIR):
+            if name.endswith(".json"):
+                load_catalog_file(name[:-len(".json")])
+    for api_key in CATALOG_WARM_KEYS:
+        get_catalog(api_key, avatar_headers_for(api_key))
+    return time.time()
+
+warm_catalogs()
+
+def session_catalog():
+    """This session's read-only view of the shared catalog for its API key"""
+    if not st.session_state.avatar_api_key:
+        return EMPTY_CATALOG
+    entry = CATALOG_REGISTRY["entries"].get(api_key_fingerprint(st.session_state.avatar_api_key))
+    return entry or EMPTY_CATALOG
+
+def apply_cached_catalog():
+    """Point this session at the newest shared catalog; True when the version changed"""
+    entry = get_catalog(st.session_state.avatar_api_key, get_avatar_headers())
+    if entry is None or entry["fetched_at"] == st.session_state.catalog_version:
+        return False
+    st.session_state.catalog_version = entry["fetched_at"]
+    return True
+
+# ==========================================
+# CATALOG INDEX
+# ==========================================
+AVATAR_FACETS = ["gender", "ethnicity", "ageGroup"]
+VOICE_FACETS = ["languages", "voiceType", "gender"]
+
+def facet_values(item, facet):
+    """Values an item contributes to a facet (languages is multi-valued)"""
+    if facet == "languages":
+        return item.get('languages', [])
+    if facet == "ethnicity":
+        return [item.get('ethnicity', 'Other')]
+    return [item[facet]] if item.get(facet) else []
+
+def avatar_label(a):
+    return f"{a['name']} | {a.get('gender', 'N/A')} | {a.get('ethnicity', 'N/A')}"
+
+def voice_label(v):
+    return f"{v['name']} ({v.get('gender', 'N/A')}) - {'/'.join(v.get('languages', []))}"
+
+def build_facet_index(items, facets, label_fn):
+    """Inverted index facet -> value -> positions, plus option lists and labels"""
+    postings = {facet: {} for facet in facets}
+    for pos, item in enumerate(items):
+        for facet in facets:
+            for value in facet_values(item, facet):
+                postings[facet].setdefault(value, set()).add(pos)
+    return {
+        "items": items,
+        "postings": {f: {v: frozenset(p) for v, p in vals.items()} for f, vals in postings.items()},
+        "options": {f: ["All"] + sorted(vals) for f, vals in postings.items()},
+        "labels": [label_fn(item) for item in items],
+        "filter_cache": {},
     }
 
-    /* Section Headers */
-    h1, h2, h3, h4, h5, h6 {
-        color: #00ff41 !important;
-        font-family: 'Orbitron', monospace !important;
-        text-shadow: 0 0 5px #00ff41;
+@st.cache_resource(max_entries=16)
+def get_catalog_index(fingerprint, version, _avatars, _voices):
+    """Facet indexes for one catalog version, built once and shared by all reruns"""
+    return {
+        "avatars": build_facet_index(_avatars, AVATAR_FACETS, avatar_label),
+        "voices": build_facet_index(_voices, VOICE_FACETS, voice_label),
     }
 
-    /* Matrix Rain Characters */
-    .matrix-char {
-        position: fixed;
-        color: #00ff41;
-        font-family: 'Share Tech Mono', monospace;
-        font-size: 20px;
-        opacity: 0.8;
-        pointer-events: none;
-        animation: fall linear infinite;
+def filter_catalog(index, selections):
+    """Answer a facet combination by set intersection; returns (labels, label -> item), cached"""
+    key = tuple(selections.items())
+    cached = index["filter_cache"].get(key)
+    if cached is not None:
+        return cached
+    
+    matches = None
+    for facet, value in selections.items():
+        if value == "All":
+            continue
+        posting = index["postings"][facet].get(value, frozenset())
+        matches = posting if matches is None else matches & posting
+    
+    positions = range(len(index["items"])) if matches is None else sorted(matches)
+    label_map = {index["labels"][pos]: index["items"][pos] for pos in positions}
+    result = (list(label_map), label_map)
+    index["filter_cache"][key] = result
+    return result
+
+# ==========================================
+# DUBBING FAN-OUT
+# ==========================================
+DUBBING_LANGUAGES = [
+    "es (Spanish)", "fr (French)", "de (German)", "it (Italian)", "pt (Portuguese)",
+    "zh (Chinese)", "ja (Japanese)", "ko (Korean)", "ar (Arabic)", "hi (Hindi)"
+]
+
+def submit_dubbing_languages(source_url, source_lang, target_codes, headers):
+    """Submit one dubbingV2 job per target language concurrently; yields (code, result, error, attempts)"""
+    with ThreadPoolExecutor(max_workers=len(target_codes)) as executor:
+        futures = {
+            executor.submit(post_with_retry, API_ENDPOINTS["DUBBING"], headers, with_webhook({
+                "sourceUrl": source_url,
+                "targetLanguage": code,
+                "sourceLanguage": source_lang
+            })): code
+            for code in target_codes
+        }
+        for future in as_completed(futures):
+            res, err, attempts = future.result()
+            yield futures[future], res, err, attempts
+
+def run_dubbing_fanout(target_codes):
+    """Submit the given languages of the current dubbing run, recording each outcome"""
+    run = st.session_state.dubbing_run
+    for code in target_codes:
+        run["languages"][code] = {"status": "submitting", "project_id": None, "error": None, "attempts": 0}
+    
+    for code, res, err, attempts in submit_dubbing_languages(run["source_url"], run["source_lang"], target_codes, get_avatar_headers()):
+        lang = run["languages"][code]
+        lang["attempts"] += attempts
+        if res and res.get('id'):
+            lang.update(status="submitted", project_id=res['id'], error=None)
+            register_job(res['id'], "dubbing", f"Dubbing → {code}")
+        elif is_unconfirmed_error(err):
+            lang.update(status="unconfirmed", error=err)
+        else:
+            lang.update(status="failed", error=err or "No project id returned")
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_dubbing_tracker():
+    """Combined per-language view of the current dubbing run"""
+    run = st.session_state.dubbing_run
+    if not run:
+        return
+    
+    drain_status_updates()
+    
+    rows = []
+    for code, lang in run["languages"].items():
+        job = st.session_state.active_jobs.get(lang["project_id"]) or {}
+        rows.append({
+            "Language": code,
+            "Project ID": lang["project_id"] or "—",
+            "Submission": lang["status"],
+            "Job Status": job.get("status", "—"),
+            "Progress": job.get("progress", 0.0),
+            "Attempts": lang["attempts"],
+            "Error": lang["error"] or status_check_error(job),
+        })
+    st.markdown(f"#### 📡 DUBBING TRACKER · `{run['source_url']}`")
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Progress": st.column_config.ProgressColumn("Progress", min_value=0.0, max_value=1.0)}
+    )
+
+# ==========================================
+# LONG SCRIPT CHUNKING
+# ==========================================
+CLIP_SCRIPT_MAX_CHARS = 5000
+LONG_SCRIPT_CHUNK_CHARS = 4500  # headroom below the API limit
+
+def split_script_units(script, max_chars):
+    """(text, separator) units no longer than max_chars: paragraphs, then sentences, then words"""
+    units = []
+    for paragraph in re.split(r"\n\s*\n", script.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append((paragraph, "\n\n"))
+            continue
+        sentences = re.split(r"(?<=[.!?])\s+", paragraph)
+        for i, sentence in enumerate(sentences):
+            separator = "\n\n" if i == 0 else " "
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars + 1)
+                cut = cut if cut > 0 else max_chars
+                units.append((sentence[:cut].rstrip(), separator))
+                sentence, separator = sentence[cut:].lstrip(), " "
+            if sentence:
+                units.append((sentence, separator))
+    return units
+
+def split_script(script, max_chars=LONG_SCRIPT_CHUNK_CHARS):
+    """Pack a script into ordered chunks below max_chars, splitting on paragraph or sentence boundaries"""
+    chunks = []
+    current = ""
+    for text, separator in split_script_units(script, max_chars):
+        if current and len(current) + len(separator) + len(text) <= max_chars:
+            current += separator + text
+        else:
+            if current:
+                chunks.append(current)
+            current = text
+    if current:
+        chunks.append(current)
+    return chunks
+
+def submit_script_chunks(chunks, indices, actor_id, voice_id, headers):
+    """Submit the given chunks as clip jobs concurrently; yields (index, result, error, attempts)"""
+    with ThreadPoolExecutor(max_workers=min(len(indices), BATCH_DEFAULT_CONCURRENCY)) as executor:
+        futures = {
+            executor.submit(post_with_retry, API_ENDPOINTS["GENERATE_CLIP"], headers, with_webhook({
+                "actorId": actor_id,
+                "voiceId": voice_id,
+                "script": chunks[i]
+            })): i
+            for i in indices
+        }
+        for future in as_completed(futures):
+            res, err, attempts = future.result()
+            yield futures[future], res, err, attempts
+
+def start_long_script(script, avatar, voice):
+    """Create the logical project for a long script and submit all of its parts"""
+    chunks = split_script(script)
+    st.session_state.long_script_run = {
+        "label": avatar['name'],
+        "actor_id": avatar['id'],
+        "voice_id": voice['id'],
+        "chunks": chunks,
+        "parts": [{"status": "pending", "project_id": None, "error": None, "attempts": 0} for _ in chunks],
+        "submitted_at": time.time(),
     }
+    run_long_script(range(len(chunks)))
+
+def run_long_script(indices):
+    """Submit the given parts of the current long-script project, recording each outcome"""
+    run = st.session_state.long_script_run
+    indices = list(indices)
+    for i in indices:
+        run["parts"][i].update(status="submitting", error=None)
+    
+    total = len(run["chunks"])
+    for i, res, err, attempts in submit_script_chunks(run["chunks"], indices, run["actor_id"], run["voice_id"], get_avatar_headers()):
+        part = run["parts"][i]
+        part["attempts"] += attempts
+        if res and res.get('id'):
+            part.update(status="submitted", project_id=res['id'], error=None)
+            register_job(res['id'], "clip", f"{run['label']} · part {i + 1}/{total}")
+        elif is_unconfirmed_error(err):
+            part.update(status="unconfirmed", error=err)
+        else:
+            part.update(status="failed", error=err or "No project id returned")
+
+def long_script_status(run):
+    """Overall status and progress of a long-script project from its parts"""
+    jobs = [st.session_state.active_jobs.get(part["project_id"]) or {} for part in run["parts"]]
+    statuses = [job.get("status", "").lower() for job in jobs]
+    progress = sum(job.get("progress", 0.0) for job in jobs) / len(jobs)
+    if any(part["status"] == "failed" for part in run["parts"]) or "failed" in statuses:
+        return "Failed", progress
+    if any(part["status"] == "unconfirmed" for part in run["parts"]):
+        return "Unconfirmed", progress
+    if all(status == "completed" for status in statuses):
+        return "Completed", 1.0
+    return "Processing", progress
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_long_script_tracker():
+    """Combined, ordered view of the parts of the current long-script project"""
+    run = st.session_state.long_script_run
+    if not run:
+        return
+    
+    drain_status_updates()
+    
+    status, progress = long_script_status(run)
+    rows = []
+    for i, part in enumerate(run["parts"]):
+        job = st.session_state.active_jobs.get(part["project_id"]) or {}
+        rows.append({
+            "Part": i + 1,
+            "Characters": len(run["chunks"][i]),
+            "Project ID": part["project_id"] or "—",
+            "Submission": part["status"],
+            "Job Status": job.get("status", "—"),
+            "Progress": job.get("progress", 0.0),
+            "Video": job.get("video_url", ""),
+            "Error": part["error"] or status_check_error(job),
+        })
+    st.markdown(f"#### 🧩 LONG SCRIPT · {run['label']} · {len(run['parts'])} parts")
+    st.progress(progress, text=f"{status} · {int(time.time() - run['submitted_at'])}s")
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Progress": st.column_config.ProgressColumn("Progress", min_value=0.0, max_value=1.0),
+            "Video": st.column_config.LinkColumn("Video"),
+        }
+    )
+
+# ==========================================
+# BATCH ENGINE
+# ==========================================
+BATCH_DIR = os.path.join(DATA_DIR, "batches")
+BATCH_DEFAULT_CONCURRENCY = 4
+BATCH_MAX_ATTEMPTS = MAX_SUBMIT_ATTEMPTS
+BATCH_POLL_INTERVAL = 10  # seconds between status sweeps once rows are submitted
+BATCH_POLL_TIMEOUT = 6 * 3600  # stop following render status after this long
+
+@st.cache_resource
+def get_batch_registry():
+    """Process-wide batch state shared by the runner threads and every session"""
+    return {"lock": threading.Lock(), "batches": {}, "threads": {}}
+
+BATCH_REGISTRY = get_batch_registry()
+
+def batch_path(key_fp, batch_id):
+    return os.path.join(BATCH_DIR, key_fp, f"{batch_id}.json")
+
+def save_batch(batch):
+    """Persist a batch so it can be resumed after a refresh or restart"""
+    with BATCH_REGISTRY["lock"]:
+        write_json_atomic(batch_path(batch["key_fp"], batch["id"]), batch)
+
+def load_batch(key_fp, batch_id):
+    """Get one of the API key's batches from memory, falling back to its persisted file"""
+    batch = BATCH_REGISTRY["batches"].get(batch_id)
+    if batch is None and os.path.exists(batch_path(key_fp, batch_id)):
+        with open(batch_path(key_fp, batch_id)) as f:
+            batch = BATCH_REGISTRY["batches"].setdefault(batch_id, json.load(f))
+    if batch is not None and batch.get("key_fp") != key_fp:
+        return None
+    return batch
 
-    @keyframes fall {
-        to {
-            transform: translateY(100vh);
-            opacity: 0;
+def list_saved_batches(key_fp):
+    """IDs of the API key's persisted batches, newest first"""
+    key_dir = os.path.join(BATCH_DIR, key_fp)
+    if not os.path.isdir(key_dir):
+        return []
+    files = [f for f in os.listdir(key_dir) if f.endswith(".json")]
+    files.sort(key=lambda f: os.path.getmtime(os.path.join(key_dir, f)), reverse=True)
+    return [f[:-5] for f in files]
+
+def create_batch(key_fp, csv_bytes, df, concurrency):
+    """Build batch state from an uploaded CSV; the same file under the same API key always maps to the same batch"""
+    batch_id = hashlib.sha1(key_fp.encode() + csv_bytes).hexdigest()[:12]
+    existing = load_batch(key_fp, batch_id)
+    if existing:
+        return existing
+    
+    rows = []
+    for index, record in enumerate(df.fillna("").to_dict("records")):
+        script = str(record.get("script", "")).strip()
+        row = {
+            "index": index,
+            "script": script,
+            "avatar_id": str(record.get("avatar_id", "")).strip(),
+            "voice_id": str(record.get("voice_id", "")).strip(),
+            "status": "queued",
+            "project_id": None,
+            "job_status": None,
+            "attempts": 0,
+            "error": None,
+            "submitted_at": None,
+            "callback_until": None,
         }
+        if not script or not row["avatar_id"] or not row["voice_id"]:
+            row.update(status="failed", error="Missing script, avatar_id or voice_id")
+        elif len(script) > 5000:
+            row.update(status="failed", error="Script exceeds 5000 character limit")
+        rows.append(row)
+    
+    batch = {
+        "id": batch_id,
+        "key_fp": key_fp,
+        "created_at": time.time(),
+        "concurrency": concurrency,
+        "run_started_at": None,
+        "finished_at": None,
+        "rows": rows,
     }
+    BATCH_REGISTRY["batches"][batch_id] = batch
+    save_batch(batch)
+    return batch
+
+def submit_batch_row(batch, row, headers):
+    """Submit one row to GENERATE_CLIP, retrying transient failures with backoff"""
+    payload = with_webhook({"actorId": row["avatar_id"], "voiceId": row["voice_id"], "script": row["script"]})
+    row["status"] = "submitting"
+    save_batch(batch)  # on disk before the POST, so an interrupted submission is never silently repeated
+    res, err, attempts = post_with_retry(API_ENDPOINTS["GENERATE_CLIP"], headers, payload, BATCH_MAX_ATTEMPTS)
+    row["attempts"] += attempts
+    if res:
+        row.update(status="submitted", project_id=res.get('id'), job_status=res.get('status', 'Pending'),
+                   error=None, submitted_at=time.time())
+        if "callbackUrl" in payload and row["project_id"]:
+            row["callback_until"] = time.time() + WEBHOOK_FALLBACK_AFTER
+            follow_batch_row(row)
+    elif is_unconfirmed_error(err):
+        row.update(status="unconfirmed", error=err)
+    else:
+        row.update(status="failed", error=err)
+    save_batch(batch)
+
+def follow_batch_row(row):
+    """Take the row's job status from webhook notifications while it waits for its callback"""
+    def on_notification(res):
+        row["job_status"] = res.get('status', row["job_status"])
+        row["callback_until"] = time.time() + WEBHOOK_FALLBACK_AFTER
+    subscribe_webhook(row["project_id"], on_notification)
+
+def poll_batch_rows(batch, headers):
+    """Refresh job status of submitted rows until every one is terminal; rows awaiting a callback are skipped"""
+    deadline = time.time() + BATCH_POLL_TIMEOUT
+    while time.time() < deadline:
+        pending = [r for r in batch["rows"] if r["project_id"]
+                   and (r["job_status"] or "").lower() not in TERMINAL_JOB_STATUSES]
+        if not pending:
+            return
+        now = time.time()
+        due = [r for r in pending if (r.get("callback_until") or 0) <= now]
+        if due:
+            fallback = sum(1 for r in due if r.get("callback_until"))
+            if fallback:
+                record_webhook_event("fallback_polls", fallback)
+            urls = {r["index"]: f"{API_ENDPOINTS['GENERATE_CLIP']}/{r['project_id']}" for r in due}
+            rows_by_index = {r["index"]: r for r in due}
+            for index, res, err in fetch_concurrently(urls, headers):
+                if res:
+                    rows_by_index[index]["job_status"] = res.get('status', rows_by_index[index]["job_status"])
+        save_batch(batch)
+        time.sleep(BATCH_POLL_INTERVAL)
+
+def settle_interrupted_rows(batch):
+    """Mark rows left mid-submission by a stopped runner as unconfirmed (call only while no runner is active)"""
+    # Their POST may have been accepted, so resubmitting them could create duplicate paid clips
+    interrupted = [r for r in batch["rows"] if r["status"] == "submitting"]
+    for row in interrupted:
+        row.update(status="unconfirmed", error="Interrupted mid-submission; check the library before resubmitting")
+    return bool(interrupted)
+
+def batch_has_pending_work(batch):
+    """Rows still to submit, or submitted jobs whose render status is not final"""
+    return any(
+        r["status"] == "queued"
+        or (r["project_id"] and (r["job_status"] or "").lower() not in TERMINAL_JOB_STATUSES)
+        for r in batch["rows"]
+    )
+
+def run_batch(batch, headers):
+    """Runner thread: submit queued rows with bounded concurrency, then follow their status"""
+    batch["run_started_at"] = time.time()
+    batch["finished_at"] = None
+    settle_interrupted_rows(batch)
+    outstanding = [r for r in batch["rows"] if r["status"] == "queued"]
+    # Resumed rows still waiting on a callback re-subscribe; one that was missed is polled at its deadline
+    for row in batch["rows"]:
+        if row.get("callback_until") and row["project_id"] and (row["job_status"] or "").lower() not in TERMINAL_JOB_STATUSES:
+            follow_batch_row(row)
+    try:
+        with ThreadPoolExecutor(max_workers=batch["concurrency"]) as executor:
+            for row in outstanding:
+                executor.submit(submit_batch_row, batch, row, headers)
+        poll_batch_rows(batch, headers)
+    finally:
+        batch["finished_at"] = time.time()
+        save_batch(batch)
+        BATCH_REGISTRY["threads"].pop(batch["id"], None)
 
-    /* Neural Network Background Pattern */
-    .neural-bg {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background-image: 
-            radial-gradient(circle at 20% 50%, rgba(0, 255, 65, 0.05) 0%, transparent 50%),
-            radial-gradient(circle at 80% 80%, rgba(57, 255, 20, 0.05) 0%, transparent 50%),
-            radial-gradient(circle at 40% 20%, rgba(0, 255, 65, 0.03) 0%, transparent 50%);
-        pointer-events: none;
-        z-index: 0;
+def start_batch(batch, headers):
+    """Start (or resume) a batch in the background unless it is already running"""
+    with BATCH_REGISTRY["lock"]:
+        if batch["id"] in BATCH_REGISTRY["threads"]:
+            return False
+        thread = threading.Thread(target=run_batch, args=(batch, headers), daemon=True, name=f"batch-{batch['id']}")
+        BATCH_REGISTRY["threads"][batch["id"]] = thread
+    thread.start()
+    return True
+
+def retry_failed_rows(batch):
+    """Requeue rows that failed submission (validation failures stay failed)"""
+    for row in batch["rows"]:
+        if row["status"] == "failed" and row["error"] and not row["error"].startswith(("Missing", "Script exceeds")):
+            row.update(status="queued", attempts=0, error=None)
+
+def resubmit_unconfirmed_rows(batch):
+    """Requeue unconfirmed rows once the user has checked that their submission never went through"""
+    for row in batch["rows"]:
+        if row["status"] == "unconfirmed":
+            row.update(status="queued", attempts=0, error=None)
+
+def batch_throughput(batch):
+    """Clips submitted per minute during the current (or last) run"""
+    started = batch.get("run_started_at")
+    if not started:
+        return 0.0
+    submitted = [r["submitted_at"] for r in batch["rows"] if r["submitted_at"] and r["submitted_at"] >= started]
+    if not submitted:
+        return 0.0
+    elapsed = max((batch.get("finished_at") or time.time()) - started, 1)
+    return len(submitted) / elapsed * 60
+
+def render_batch_monitor(batch_id):
+    """Snapshot view of one batch"""
+    import pandas as pd
+    batch = load_batch(session_key_fp(), batch_id)
+    if not batch:
+        return
+    
+    rows = batch["rows"]
+    running = batch_id in BATCH_REGISTRY["threads"]
+    submitted = len([r for r in rows if r["status"] == "submitted"])
+    failed = len([r for r in rows if r["status"] in ("failed", "unconfirmed")])
+    completed = len([r for r in rows if (r["job_status"] or "").lower() == "completed"])
+    
+    met_col1, met_col2, met_col3, met_col4, met_col5 = st.columns(5)
+    met_col1.metric("Rows", len(rows))
+    met_col2.metric("Submitted", submitted)
+    met_col3.metric("Completed", completed)
+    met_col4.metric("Failed", failed)
+    met_col5.metric("Clips / min", f"{batch_throughput(batch):.1f}")
+    
+    st.progress((submitted + failed) / len(rows) if rows else 1.0,
+                text=f"Batch `{batch_id}` · {'RUNNING' if running else 'IDLE'}")
+    st.dataframe(
+        pd.DataFrame(rows)[["index", "status", "project_id", "job_status", "attempts", "error"]],
+        use_container_width=True,
+        hide_index=True
+    )
+
+@st.fragment(run_every=2)
+def render_live_batch_monitor(batch_id):
+    """Batch view that reruns on its own timer while the runner works"""
+    render_batch_monitor(batch_id)
+    if batch_id not in BATCH_REGISTRY["threads"]:
+        st.rerun()  # full rerun swaps in the static view, dropping this timer
+
+# ==========================================
+# STREAMING SCRIPT GENERATION
+# ==========================================
+def open_api_stream(url, headers, payload):
+    """POST with a streamed response; returns (response, error) like safe_api_call"""
+    timeout = API_TIMEOUTS.get(resolve_endpoint_name(url), DEFAULT_API_TIMEOUT)
+    response, error = send_rate_limited("POST", url, headers, timeout, json=payload, stream=True)
+    if error:
+        return None, error
+    if response.status_code != 200:
+        error = f"Error {response.status_code}: {response.text}"
+        response.close()
+        return None, error
+    return response, None
+
+def stream_script_with_openai(prompt, script_type="general", tone="professional", length="medium",
+                              force=False, headers=None, result=None):
+    """Yield script text token by token; the full text lands in result["content"] once complete"""
+    result = result if result is not None else {}
+    payload = build_script_payload(prompt, script_type, tone, length)
+    if not force:
+        cached = script_cache_get(payload)
+        if cached is not None:
+            result.update(content=cached, cached=True)
+            yield cached
+            return
+    
+    response, error = open_api_stream(OPENAI_API_ENDPOINT, headers or get_openai_headers(), {**payload, "stream": True})
+    if error:
+        result["error"] = error
+        return
+    
+    parts = []
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+            if delta:
+                parts.append(delta)
+                yield delta
+        else:
+            result["error"] = "Stream ended before completion"
+            return
+    finally:
+        # Also runs when the consumer stops early (cancel / rerun), dropping the connection
+        response.close()
+    
+    result["content"] = "".join(parts)
+    script_cache_put(payload, result["content"])
+
+# ==========================================
+# LIBRARY RENDERING
+# ==========================================
+LIBRARY_PAGE_SIZES = [12, 24, 48, 96]
+LIBRARY_GRID_COLUMNS = 4
+THUMBNAIL_KEYS = ("thumbnailUrl", "thumbnailImagePath", "thumbnail", "previewImageUrl")
+
+STATUS_CLASS_MAP = {
+    'completed': 'status-completed',
+    'pending': 'status-pending',
+    'processing': 'status-processing',
+    'failed': 'status-failed'
+}
+
+def get_library_page(status_filter, sort_by, page, page_size):
+    """(total matches, items on the page) from the project store, cached until the store changes"""
+    fp = session_key_fp()
+    key = (fp, store_version(fp), status_filter, sort_by, page, page_size)
+    cache = st.session_state.library_view_cache
+    if cache and cache[0] == key:
+        return cache[1]
+    
+    total = store_count(fp, status_filter)
+    items = store_query(fp, status_filter, sort_by, limit=page_size, offset=(page - 1) * page_size)
+    st.session_state.library_view_cache = (key, (total, items))
+    return total, items
+
+def render_project_detail(item, expanded=False):
+    """Expander with project details; the video player mounts only on request"""
+    status = item.get('status', 'Unknown')
+    status_class = STATUS_CLASS_MAP.get(status.lower(), 'status-pending')
+    
+    with st.expander(f"🎬 Project #{item.get('id', 'N/A')[:8]}... | Status: {status}", expanded=expanded):
+        proj_col1, proj_col2 = st.columns([1, 2])
+        
+        with proj_col1:
+            st.markdown(f'<span class="status-badge {status_class}">{status}</span>', unsafe_allow_html=True)
+            
+            st.markdown("**Project Details:**")
+            st.markdown(f"- **ID:** `{item.get('id', 'N/A')}`")
+            st.markdown(f"- **Created:** {item.get('createdDate', 'N/A')}")
+            st.markdown(f"- **Updated:** {item.get('updatedDate', 'N/A')}")
+            
+            if status.lower() not in TERMINAL_JOB_STATUSES:
+                st.caption("🛰️ Status is tracked automatically")
+            
+            if status.lower() == "completed" and 'videoUrl' in item:
+                st.markdown(f"[📥 Download video]({item['videoUrl']})")
+        
+        with proj_col2:
+            if status.lower() == "completed" and 'videoUrl' in item:
+                st.markdown("**🎥 Video Preview:**")
+                if st.toggle("▶️ Load player", value=expanded, key=f"play_{item['id']}"):
+                    st.video(item['videoUrl'])
+            else:
+                st.markdown("**📝 Script:**")
+                st.caption(item.get('script', 'No script available'))
+                
+                if status.lower() == "processing":
+                    st.info("⚙️ Video is being processed. Check back soon!")
+
+def render_project_card(item):
+    """Lightweight grid tile: thumbnail, status and an open button"""
+    status = item.get('status', 'Unknown')
+    status_class = STATUS_CLASS_MAP.get(status.lower(), 'status-pending')
+    thumbnail = next((item[k] for k in THUMBNAIL_KEYS if item.get(k)), None)
+    
+    with st.container(border=True):
+        if thumbnail:
+            st.image(thumbnail, use_container_width=True)
+        else:
+            st.markdown("<div style='text-align: center; font-size: 2.5rem;'>🎬</div>", unsafe_allow_html=True)
+        st.markdown(f'<span class="status-badge {status_class}">{status}</span>', unsafe_allow_html=True)
+        st.caption(f"#{item.get('id', 'N/A')[:8]} · {item.get('createdDate', '')[:10]}")
+        if st.button("🔎 OPEN", key=f"open_{item['id']}", use_container_width=True):
+            st.session_state.library_open = item['id']
+            st.rerun(scope="fragment")
+
+# ==========================================
+# ANALYTICS ENGINE
+# ==========================================
+def build_history_frame(rows):
+    """Typed, columnar view of project history rows from the store"""
+    import pandas as pd
+    frame = pd.DataFrame.from_records(
+        rows, columns=["id", "status", "createdDate", "updatedDate", "actorId", "voiceId"]
+    )
+    frame["status"] = frame["status"].astype("category")
+    frame["created"] = pd.to_datetime(frame.pop("createdDate"), errors="coerce", utc=True)
+    frame["updated"] = pd.to_datetime(frame.pop("updatedDate"), errors="coerce", utc=True)
+    frame["actorId"] = frame["actorId"].astype("category")
+    frame["voiceId"] = frame["voiceId"].astype("category")
+    frame["is_completed"] = frame["status"] == "completed"
+    frame["is_failed"] = frame["status"] == "failed"
+    frame["latency_s"] = (frame["updated"] - frame["created"]).dt.total_seconds().where(frame["is_completed"])
+    return frame
+
+def get_history_frame():
+    """History frame for this API key, rebuilt only when the project store changes"""
+    fp = session_key_fp()
+    version = (fp, store_version(fp))
+    cache = st.session_state.analytics_cache
+    if cache and cache["version"] == version:
+        return cache["frame"]
+    frame = build_history_frame(store_columns(fp))
+    st.session_state.analytics_cache = {"version": version, "frame": frame, "results": {}}
+    return frame
+
+def cached_analytic(fn, *args):
+    """Memoize a derived result for the current history version"""
+    frame = get_history_frame()
+    results = st.session_state.analytics_cache["results"]
+    key = (fn.__name__,) + args
+    if key not in results:
+        results[key] = fn(frame, *args)
+    return results[key]
+
+def status_counts_of(frame):
+    return frame["status"].value_counts()
+
+def render_latency_percentiles(frame):
+    latency = frame["latency_s"].dropna()
+    quantiles = latency.quantile([0.5, 0.95, 0.99]) if len(latency) else {}
+    return {
+        "p50": quantiles.get(0.5),
+        "p95": quantiles.get(0.95),
+        "p99": quantiles.get(0.99),
+        "count": len(latency),
     }
 
-    /* Scan Line Effect */
-    .scanline {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(
-            to bottom,
-            rgba(0, 255, 65, 0) 0%,
-            rgba(0, 255, 65, 0.1) 50%,
-            rgba(0, 255, 65, 0) 100%
-        );
-        background-size: 100% 4px;
-        pointer-events: none;
-        z-index: 1;
-        animation: scan 8s linear infinite;
-    }
+def throughput_series(frame, freq):
+    """Completed projects per time bucket"""
+    done = frame.loc[frame["is_completed"], ["updated"]].dropna()
+    return done.set_index("updated").resample(freq).size().rename("Completed")
+
+def failure_rate_series(frame, freq):
+    """Share of projects created in each bucket that failed"""
+    created = frame.dropna(subset=["created"]).set_index("created")
+    return created["is_failed"].resample(freq).mean().rename("Failure Rate")
+
+def history_breakdown(frame, column):
+    """Per avatar/voice volume, completion/failure rates and median latency"""
+    import pandas as pd
+    grouped = frame.groupby(column, observed=True)
+    breakdown = pd.DataFrame({
+        "Projects": grouped.size(),
+        "Completed %": grouped["is_completed"].mean() * 100,
+        "Failed %": grouped["is_failed"].mean() * 100,
+        "p50 Latency (s)": grouped["latency_s"].median(),
+    })
+    return breakdown.sort_values("Projects", ascending=False)
+
+def format_duration(seconds):
+    import pandas as pd
+    if seconds is None or pd.isna(seconds):
+        return "N/A"
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    return f"{seconds / 60:.1f}m"
+
+# ==========================================
+# API INSTRUMENTATION
+# ==========================================
+def histogram_quantile(buckets, q):
+    """Upper bound of the histogram bucket holding quantile q"""
+    total = sum(buckets)
+    if not total:
+        return None
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        cumulative += count
+        if cumulative >= q * total:
+            return bound
+    return LATENCY_BUCKETS[-1]
+
+def api_metrics_snapshot():
+    """Copy of the counters, safe to read without holding the lock"""
+    with API_METRICS["lock"]:
+        return {
+            name: {**m, "status_codes": dict(m["status_codes"]), "latency_buckets": list(m["latency_buckets"])}
+            for name, m in API_METRICS["endpoints"].items()
+        }
+
+def api_metrics_table(snapshot):
+    """One row per endpoint for the metrics panel"""
+    rows = []
+    for name, m in sorted(snapshot.items()):
+        errors = sum(c for code, c in m["status_codes"].items() if code >= 400)
+        rows.append({
+            "Endpoint": name,
+            "Requests": m["requests"],
+            "Mean (ms)": round(m["latency_sum"] / m["requests"] * 1000) if m["requests"] else 0,
+            "p50 ≤ (s)": histogram_quantile(m["latency_buckets"], 0.5),
+            "p95 ≤ (s)": histogram_quantile(m["latency_buckets"], 0.95),
+            "p99 ≤ (s)": histogram_quantile(m["latency_buckets"], 0.99),
+            "HTTP Errors": errors,
+            "Timeouts": m["timeouts"],
+            "Conn Errors": m["connection_errors"],
+            "Retries": m["retries"],
+            "Queue Wait (ms)": round(m["queue_wait_sum"] / m["requests"] * 1000) if m["requests"] else 0,
+            "Queue Timeouts": m["queue_timeouts"],
+            "Dedup Hit %": round(m["dedup_hits"] / m["dedup_requests"] * 100, 1) if m["dedup_requests"] else 0,
+            "Status Codes": ", ".join(f"{code}: {c}" for code, c in sorted(m["status_codes"].items())),
+            "KB Sent": round(m["bytes_sent"] / 1024, 1),
+            "KB Received": round(m["bytes_received"] / 1024, 1),
+        })
+    return rows
+
+def api_metrics_prometheus(snapshot):
+    """Render the counters in Prometheus text exposition format"""
+    def metric_header(name, kind, help_text):
+        return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    
+    lines = metric_header("cloner_api_requests_total", "counter", "Upstream API responses by endpoint and status code.")
+    for name, m in sorted(snapshot.items()):
+        for code, count in sorted(m["status_codes"].items()):
+            lines.append(f'cloner_api_requests_total{{endpoint="{name}",code="{code}"}} {count}')
+    
+    lines += metric_header("cloner_api_request_duration_seconds", "histogram", "Upstream API request latency.")
+    for name, m in sorted(snapshot.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, m["latency_buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else bound
+            lines.append(f'cloner_api_request_duration_seconds_bucket{{endpoint="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'cloner_api_request_duration_seconds_sum{{endpoint="{name}"}} {m["latency_sum"]:.6f}')
+        lines.append(f'cloner_api_request_duration_seconds_count{{endpoint="{name}"}} {m["requests"]}')
+    
+    counters = [
+        ("cloner_api_timeouts_total", "timeouts", "Upstream API requests that timed out."),
+        ("cloner_api_connection_errors_total", "connection_errors", "Upstream API requests that failed to connect."),
+        ("cloner_api_retries_total", "retries", "Upstream API requests retried after a transient failure."),
+        ("cloner_api_queue_wait_seconds_total", "queue_wait_sum", "Time spent queued in the per-host rate limiter."),
+        ("cloner_api_queue_timeouts_total", "queue_timeouts", "Requests that gave up waiting for a rate limiter slot."),
+        ("cloner_api_dedup_requests_total", "dedup_requests", "Idempotent calls eligible for single-flight coalescing."),
+        ("cloner_api_dedup_hits_total", "dedup_hits", "Calls served by joining an identical in-flight request."),
+        ("cloner_api_sent_bytes_total", "bytes_sent", "Request body bytes sent upstream."),
+        ("cloner_api_received_bytes_total", "bytes_received", "Response body bytes received from upstream."),
+    ]
+    for metric, field, help_text in counters:
+        lines += metric_header(metric, "counter", help_text)
+        for name, m in sorted(snapshot.items()):
+            lines.append(f'{metric}{{endpoint="{name}"}} {m[field]}')
+    return "\n".join(lines) + "\n"
 
-    @keyframes scan {
-        0% { transform: translateY(-100%); }
-        100% { transform: translateY(100%); }
-    }
+# ==========================================
+# BENCHMARK
+# ==========================================
+BENCHMARK_RUNS_PATH = os.path.join(DATA_DIR, "benchmarks.json")
+BENCHMARK_MAX_SAVED = 50
 
-    /* Holographic Effect */
-    .holo-effect {
-        position: relative;
-        overflow: hidden;
-    }
+def classify_api_error(error):
+    """Bucket a safe_api_call error string for the error breakdown"""
+    if error.startswith("Error "):
+        return f"HTTP {error[6:9]}"
+    if error.startswith("Request timeout"):
+        return "timeout"
+    if error.startswith(("Connection Error", "Could not connect")):
+        return "connection"
+    if error.startswith("Invalid response"):
+        return "invalid_response"
+    if error.startswith("Rate limited"):
+        return "rate_limited"
+    return "other"
 
-    .holo-effect::after {
-        content: "";
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: linear-gradient(
-            45deg,
-            transparent 30%,
-            rgba(0, 255, 65, 0.1) 50%,
-            transparent 70%
-        );
-        animation: hologram 3s linear infinite;
-    }
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(q * len(sorted_values) / 100) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
 
-    @keyframes hologram {
-        0% { transform: translateX(-100%) translateY(-100%) rotate(0deg); }
-        100% { transform: translateX(100%) translateY(100%) rotate(360deg); }
-    }
+def timed_api_call(method, url, headers, payload):
+    """(upstream latency, time queued in the rate limiter, error) for one request"""
+    started = time.perf_counter()
+    kwargs = {"json": payload} if method == "POST" else {}
+    timing = {}
+    # Every benchmark request must reach upstream, so identical GETs are not coalesced
+    _, err = safe_api_call(method, url, headers, coalesce=False, timing=timing, **kwargs)
+    queue_wait = timing.get("queue_wait", 0.0)
+    return time.perf_counter() - started - queue_wait, queue_wait, err
 
-    /* Terminal-style output */
-    .terminal-output {
-        background: rgba(0, 0, 0, 0.9);
-        border: 2px solid #00ff41;
-        border-radius: 5px;
-        padding: 15px;
-        font-family: 'Share Tech Mono', monospace;
-        color: #00ff41;
-        margin: 10px 0;
-        box-shadow: inset 0 0 20px rgba(0, 255, 65, 0.2);
+def run_benchmark(endpoint, method, headers, payload=None, total=50, concurrency=5, warmup=3, rate=0, on_progress=None):
+    """Fire `total` requests at an endpoint with bounded concurrency and an optional rate cap (req/s)"""
+    url = API_ENDPOINTS[endpoint]
+    for _ in range(warmup):
+        timed_api_call(method, url, headers, payload)
+    
+    def scheduled_call(i, start):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return timed_api_call(method, url, headers, payload)
+    
+    latencies, queue_waits, errors = [], [], Counter()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(scheduled_call, i, started) for i in range(total)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            latency, queue_wait, err = future.result()
+            latencies.append(latency)
+            queue_waits.append(queue_wait)
+            if err:
+                errors[classify_api_error(err)] += 1
+            if on_progress:
+                on_progress(done / total)
+    wall_time = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "id": datetime.now().strftime("%Y%m%d-%H%M%S"),
+        "endpoint": endpoint,
+        "method": method,
+        "total": total,
+        "concurrency": concurrency,
+        "warmup": warmup,
+        "rate": rate,
+        "wall_time_s": wall_time,
+        "throughput_rps": total / wall_time if wall_time else 0.0,
+        "success": total - sum(errors.values()),
+        "errors": dict(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "queue_wait_ms": sum(queue_waits) / total * 1000,
     }
 
-    /* Glowing dots */
-    .glow-dot {
-        width: 8px;
-        height: 8px;
-        border-radius: 50%;
-        background: #00ff41;
-        box-shadow: 0 0 10px #00ff41, 0 0 20px #00ff41;
-        display: inline-block;
-        margin: 0 5px;
-        animation: glow-pulse 2s infinite;
-    }
+def load_benchmark_runs():
+    if not os.path.exists(BENCHMARK_RUNS_PATH):
+        return []
+    try:
+        with open(BENCHMARK_RUNS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
 
-    @keyframes glow-pulse {
-        0%, 100% { opacity: 1; transform: scale(1); }
-        50% { opacity: 0.5; transform: scale(0.8); }
-    }
-</style>
-""", unsafe_allow_html=True)
+def save_benchmark_run(run):
+    runs = [r for r in load_benchmark_runs() if r["id"] != run["id"]]
+    runs.insert(0, run)
+    write_json_atomic(BENCHMARK_RUNS_PATH, runs[:BENCHMARK_MAX_SAVED])
 
-# ==========================================
-# CONSTANTS & API CONFIGURATION
-# ==========================================
-API_ENDPOINTS = {
-    "AVATAR_LIST": "https://avatar.pipio.ai/actor",
-    "VOICE_LIST": "https://avatar.pipio.ai/voice",
-    "GENERATE_CLIP": "https://generate.pipio.ai/single-clip",
-    "DUBBING": "https://project.pipio.ai/project/generate/dubbingV2",
-    "LIPSYNC": "https://project.pipio.ai/project/generate/lipsync",
-}
+def benchmark_label(run):
+    return f"{run['id']} · {run['method']} {run['endpoint']} · c={run['concurrency']} n={run['total']}"
 
-OPENAI_API_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+def benchmark_summary_rows(runs):
+    return [{
+        "Run": benchmark_label(run),
+        "Throughput (req/s)": round(run["throughput_rps"], 2),
+        "p50 (ms)": round(run["p50_ms"]),
+        "p90 (ms)": round(run["p90_ms"]),
+        "p99 (ms)": round(run["p99_ms"]),
+        "Max (ms)": round(run["max_ms"]),
+        "Mean Queue Wait (ms)": round(run.get("queue_wait_ms", 0)),
+        "Success": f"{run['success']}/{run['total']}",
+        "Errors": ", ".join(f"{k}: {v}" for k, v in run["errors"].items()) or "—",
+    } for run in runs]
 
 # ==========================================
-# API HELPER FUNCTIONS
+# STARTUP METRICS
 # ==========================================
-def get_avatar_headers():
-    """Get headers for avatar API"""
-    return {
-        "Authorization": f"Key {st.session_state.avatar_api_key}",
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
+STARTUP_MAX_SAMPLES = 500
 
-def get_openai_headers():
-    """Get headers for OpenAI API"""
+@st.cache_resource
+def get_startup_metrics(_import_seconds):
+    """Process-wide cold start timings; the first run's import time is the cold one"""
     return {
-        "Authorization": f"Bearer {st.session_state.openai_api_key}",
-        "Content-Type": "application/json"
+        "lock": threading.Lock(),
+        "import_seconds": _import_seconds,
+        "process_started": time.time(),
+        "first_renders": deque(maxlen=STARTUP_MAX_SAMPLES),
+        "first_render_count": 0,
+        "first_render_sum": 0.0,
     }
 
-def safe_api_call(method, url, headers, **kwargs):
-    """Safe API call wrapper with error handling"""
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers, timeout=30, **kwargs)
-        else:
-            response = requests.post(url, headers=headers, timeout=30, **kwargs)
-        
-        if response.status_code in [200, 201]:
-            return response.json(), None
-        else:
-            return None, f"Error {response.status_code}: {response.text}"
-    except requests.exceptions.Timeout:
-        return None, "Request timeout. Please try again."
-    except Exception as e:
-        return None, f"Connection Error: {str(e)}"
+STARTUP_METRICS = get_startup_metrics(IMPORT_SECONDS)
 
-def generate_script_with_openai(prompt, script_type="general", tone="professional", length="medium"):
-    """Generate script using OpenAI API"""
-    
-    length_guidelines = {
-        "short": "Keep the script under 100 words, concise and impactful.",
-        "medium": "Create a script between 100-300 words, well-balanced and engaging.",
-        "long": "Develop a comprehensive script between 300-500 words with detailed content.",
-        "extra_long": "Write an extensive script of 500-1000 words with in-depth coverage."
-    }
-    
-    system_prompts = {
-        "general": "You are a professional script writer for AI avatar videos. Create engaging, natural-sounding scripts.",
-        "marketing": "You are an expert marketing copywriter. Create persuasive, compelling scripts that drive action.",
-        "educational": "You are an educational content creator. Write clear, informative scripts that teach effectively.",
-        "storytelling": "You are a master storyteller. Create engaging narratives with emotional resonance.",
-        "technical": "You are a technical writer. Create clear, accurate scripts explaining complex concepts simply.",
-        "entertainment": "You are an entertainment writer. Create fun, engaging, and entertaining content.",
-        "news": "You are a news reporter. Write factual, balanced, and informative news scripts.",
-        "motivational": "You are a motivational speaker. Create inspiring, uplifting scripts that energize audiences."
-    }
-    
-    payload = {
-        "model": "gpt-4",
-        "messages": [
-            {
-                "role": "system",
-                "content": f"{system_prompts.get(script_type, system_prompts['general'])} The tone should be {tone}. {length_guidelines.get(length, length_guidelines['medium'])}"
-            },
-            {
-                "role": "user",
-                "content": f"Create a script for an AI avatar video based on this topic: {prompt}\n\nMake it natural, conversational, and suitable for video narration."
-            }
-        ],
-        "temperature": 0.7,
-        "max_tokens": 2000
-    }
-    
-    result, error = safe_api_call("POST", OPENAI_API_ENDPOINT, get_openai_headers(), json=payload)
-    
-    if result:
-        return result['choices'][0]['message']['content'], None
-    else:
-        return None, error
+def record_first_render():
+    """Time this session's first full script run (server-side first paint), once per session"""
+    if st.session_state.first_render_recorded:
+        return
+    st.session_state.first_render_recorded = True
+    elapsed = time.perf_counter() - SCRIPT_STARTED
+    with STARTUP_METRICS["lock"]:
+        STARTUP_METRICS["first_renders"].append(elapsed)
+        STARTUP_METRICS["first_render_count"] += 1
+        STARTUP_METRICS["first_render_sum"] += elapsed
+
+def startup_metrics_summary():
+    with STARTUP_METRICS["lock"]:
+        renders = sorted(STARTUP_METRICS["first_renders"])
+        return {
+            "import_seconds": STARTUP_METRICS["import_seconds"],
+            "sessions": STARTUP_METRICS["first_render_count"],
+            "render_sum": STARTUP_METRICS["first_render_sum"],
+            "p50": percentile(renders, 50),
+            "p95": percentile(renders, 95),
+        }
+
+def startup_metrics_prometheus(summary):
+    """Cold start gauges and the first render summary in Prometheus text format"""
+    lines = [
+        "# HELP cloner_startup_import_seconds Module import time of the first (cold) script run.",
+        "# TYPE cloner_startup_import_seconds gauge",
+        f"cloner_startup_import_seconds {summary['import_seconds']:.6f}",
+        "# HELP cloner_session_first_render_seconds Duration of each session's first full script run.",
+        "# TYPE cloner_session_first_render_seconds summary",
+    ]
+    for q, key in ((0.5, "p50"), (0.95, "p95")):
+        if summary[key] is not None:
+            lines.append(f'cloner_session_first_render_seconds{{quantile="{q}"}} {summary[key]:.6f}')
+    lines.append(f"cloner_session_first_render_seconds_sum {summary['render_sum']:.6f}")
+    lines.append(f"cloner_session_first_render_seconds_count {summary['sessions']}")
+    return "\n".join(lines) + "\n"
 
 # ==========================================
 # SESSION STATE INITIALIZATION
@@ -528,10 +2484,21 @@ def init_session_state():
     defaults = {
         "avatar_api_key": "",
         "openai_api_key": "",
-        "avatars": [],
-        "voices": [],
         "history": [],
+        "library_view_cache": None,
+        "library_open": None,
+        "analytics_cache": None,
+        "catalog_version": None,
         "generated_scripts": [],
+        "active_jobs": {},
+        "script_stream_cancelled": False,
+        "pending_script_stream": None,
+        "dubbing_run": None,
+        "long_script_run": None,
+        "first_render_recorded": False,
+        "history_loader": None,
+        "status_poller": None,
+        "history_error": None,
         "sync_time": None,
         "total_videos_created": 0,
         "processing_videos": 0
@@ -573,6 +2540,10 @@ with st.sidebar:
             key="openai_key_input"
         )
     
+    if st.session_state.avatar_api_key:
+        apply_cached_catalog()
+        load_stored_history()
+    
     st.markdown("---")
     
     # System Operations
@@ -582,25 +2553,43 @@ with st.sidebar:
         if not st.session_state.avatar_api_key:
             st.error("⚠️ Avatar API Key required!")
         else:
-            with st.spinner("🌐 Connecting to neural network..."):
-                time.sleep(0.5)  # Dramatic effect
-                
-                avatars, a_err = safe_api_call("GET", API_ENDPOINTS["AVATAR_LIST"], get_avatar_headers())
-                voices, v_err = safe_api_call("GET", API_ENDPOINTS["VOICE_LIST"], get_avatar_headers())
-                history, h_err = safe_api_call("GET", f"{API_ENDPOINTS['GENERATE_CLIP']}?pageSize=50", get_avatar_headers())
-                
-                if not a_err:
-                    st.session_state.avatars = avatars.get('items', [])
-                if not v_err:
-                    st.session_state.voices = voices.get('items', [])
-                if not h_err:
-                    st.session_state.history = history.get('items', [])
-                    st.session_state.total_videos_created = len([h for h in st.session_state.history if h.get('status') == 'Completed'])
-                    st.session_state.processing_videos = len([h for h in st.session_state.history if h.get('status') in ['Pending', 'Processing']])
+            sync_labels = {"avatars": "👤 Avatars", "voices": "🎤 Voices", "history": "📹 History"}
+            sync_errors = 0
+            headers = get_avatar_headers()
+            with st.status("🌐 Connecting to neural network...", expanded=True) as sync_status:
+                # Catalogs are shared by every session for this key; a recently fetched one is reused as-is
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    futures = {executor.submit(safe_api_call, "GET", history_page_url(), headers): "history"}
+                    entry, catalog_futures = sync_catalog(st.session_state.avatar_api_key, headers, executor)
+                    futures.update(catalog_futures)
+                    if not catalog_futures:
+                        st.session_state.catalog_version = entry["fetched_at"]
+                        for name in ("avatars", "voices"):
+                            sync_status.write(f"✅ {sync_labels[name]}: {len(entry[name])} loaded")
+                    try:
+                        for future in as_completed(futures):
+                            name = futures[future]
+                            result, err = future.result()
+                            if err:
+                                sync_errors += 1
+                                sync_status.write(f"❌ {sync_labels[name]}: {err}")
+                            elif name == "history":
+                                apply_first_history_page(result, headers)
+                                sync_status.write(f"✅ {sync_labels[name]}: {len(st.session_state.history)} loaded")
+                            else:
+                                st.session_state.catalog_version = result["fetched_at"]
+                                sync_status.write(f"✅ {sync_labels[name]}: {len(result[name])} loaded")
+                    finally:
+                        if catalog_futures:
+                            finish_catalog_sync(st.session_state.avatar_api_key)
                 
                 st.session_state.sync_time = datetime.now().strftime("%H:%M:%S")
-                st.success(f"✅ Synchronized at {st.session_state.sync_time}")
-                time.sleep(0.5)
+                if sync_errors:
+                    sync_status.update(label=f"⚠️ Partially synchronized at {st.session_state.sync_time}", state="error")
+                else:
+                    sync_status.update(label=f"✅ Synchronized at {st.session_state.sync_time}", state="complete")
+            
+            if not sync_errors:
                 st.rerun()
     
     if st.button("🗑️ CLEAR CACHE", use_container_width=True):
@@ -612,19 +2601,10 @@ with st.sidebar:
     # System Statistics
     st.markdown("### 📊 NEURAL METRICS")
     
-    if st.session_state.avatars:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("👤 AVATARS", len(st.session_state.avatars))
-            st.metric("📹 COMPLETED", st.session_state.total_videos_created)
-        with col2:
-            st.metric("🎤 VOICES", len(st.session_state.voices))
-            st.metric("⚙️ PROCESSING", st.session_state.processing_videos)
-        
-        if st.session_state.sync_time:
-            st.caption(f"Last sync: {st.session_state.sync_time}")
-    else:
-        st.info("🔌 No data loaded. Click SYNC to connect.")
+    render_neural_metrics()
+    render_history_stream_status()
+    if st.session_state.history_error:
+        st.caption(f"⚠️ Older history incomplete: {st.session_state.history_error}")
     
     st.markdown("---")
     
@@ -670,11 +2650,14 @@ if not st.session_state.avatar_api_key:
         <p style="color: #ff6b6b; margin: 10px 0 0 0;">Configure API keys in the control panel to activate neural systems</p>
     </div>
     """, unsafe_allow_html=True)
+    record_first_render()
     st.stop()
 
 # ==========================================
 # MAIN TABS
 # ==========================================
+# Each tab (and each advanced tool) is a fragment: its widgets rerun only that tab.
+# Switching tabs reruns the app so every tab picks up state changed elsewhere.
 tabs = st.tabs([
     "🎬 AVATAR STUDIO",
     "✍️ SCRIPT GENERATOR",
@@ -682,15 +2665,17 @@ tabs = st.tabs([
     "👄 LIP SYNCHRONIZATION",
     "📁 NEURAL LIBRARY",
     "⚙️ ADVANCED TOOLS"
-])
+], key="main_tabs", on_change="rerun")
 
 # ------------------------------------------
 # TAB 1: AVATAR VIDEO STUDIO
 # ------------------------------------------
-with tabs[0]:
+@st.fragment
+def render_avatar_studio_tab():
     st.markdown("## 🎬 DIGITAL TWIN CREATION STUDIO")
     
-    if not st.session_state.avatars:
+    catalog = session_catalog()
+    if not catalog["avatars"]:
         st.markdown("""
         <div class="matrix-card">
             <h3 style="text-align: center;">🔌 NEURAL DATABASE NOT LOADED</h3>
@@ -707,36 +2692,37 @@ with tabs[0]:
             # Avatar Configuration
             st.markdown("### 👤 AVATAR SELECTION")
             
+            catalog_index = get_catalog_index(
+                api_key_fingerprint(st.session_state.avatar_api_key),
+                catalog["fetched_at"],
+                catalog["avatars"],
+                catalog["voices"]
+            )
+            avatar_index = catalog_index["avatars"]
+            voice_index = catalog_index["voices"]
+            
             # Advanced Filters
             filter_col1, filter_col2, filter_col3 = st.columns(3)
             
             with filter_col1:
-                genders = ["All"] + sorted(list(set([a.get('gender', 'Unknown') for a in st.session_state.avatars if a.get('gender')])))
-                sel_gender = st.selectbox("🚹 Gender", genders, key="gender_filter")
+                sel_gender = st.selectbox("🚹 Gender", avatar_index["options"]["gender"], key="gender_filter")
             
             with filter_col2:
-                ethnicities = ["All"] + sorted(list(set([a.get('ethnicity', 'Other') for a in st.session_state.avatars])))
-                sel_ethnicity = st.selectbox("🌍 Ethnicity", ethnicities, key="ethnicity_filter")
+                sel_ethnicity = st.selectbox("🌍 Ethnicity", avatar_index["options"]["ethnicity"], key="ethnicity_filter")
             
             with filter_col3:
-                ages = ["All"] + sorted(list(set([a.get('ageGroup', 'Unknown') for a in st.session_state.avatars if a.get('ageGroup')])))
-                sel_age = st.selectbox("📅 Age Group", ages, key="age_filter")
+                sel_age = st.selectbox("📅 Age Group", avatar_index["options"]["ageGroup"], key="age_filter")
             
             # Apply Filters
-            filtered_avatars = st.session_state.avatars
-            if sel_gender != "All":
-                filtered_avatars = [a for a in filtered_avatars if a.get('gender') == sel_gender]
-            if sel_ethnicity != "All":
-                filtered_avatars = [a for a in filtered_avatars if a.get('ethnicity') == sel_ethnicity]
-            if sel_age != "All":
-                filtered_avatars = [a for a in filtered_avatars if a.get('ageGroup') == sel_age]
+            avatar_options, avatar_map = filter_catalog(
+                avatar_index, {"gender": sel_gender, "ethnicity": sel_ethnicity, "ageGroup": sel_age}
+            )
             
-            if not filtered_avatars:
+            if not avatar_options:
                 st.warning("⚠️ No avatars match your filters. Adjust criteria.")
-                filtered_avatars = st.session_state.avatars
+                avatar_options, avatar_map = filter_catalog(avatar_index, {})
             
-            avatar_map = {f"{a['name']} | {a.get('gender', 'N/A')} | {a.get('ethnicity', 'N/A')}": a for a in filtered_avatars}
-            sel_avatar_label = st.selectbox("Select Avatar", list(avatar_map.keys()), key="avatar_select")
+            sel_avatar_label = st.selectbox("Select Avatar", avatar_options, key="avatar_select")
             sel_avatar = avatar_map[sel_avatar_label]
             
             st.markdown("---")
@@ -747,32 +2733,24 @@ with tabs[0]:
             voice_col1, voice_col2, voice_col3 = st.columns(3)
             
             with voice_col1:
-                all_langs = sorted(list(set([lang for v in st.session_state.voices for lang in v.get('languages', [])])))
-                sel_lang = st.selectbox("🌐 Language", ["All"] + all_langs, key="voice_lang")
+                sel_lang = st.selectbox("🌐 Language", voice_index["options"]["languages"], key="voice_lang")
             
             with voice_col2:
-                voice_types = ["All"] + sorted(list(set([v.get('voiceType', 'Unknown') for v in st.session_state.voices if v.get('voiceType')])))
-                sel_voice_type = st.selectbox("🎵 Type", voice_types, key="voice_type")
+                sel_voice_type = st.selectbox("🎵 Type", voice_index["options"]["voiceType"], key="voice_type")
             
             with voice_col3:
-                voice_genders = ["All"] + sorted(list(set([v.get('gender', 'Unknown') for v in st.session_state.voices if v.get('gender')])))
-                sel_voice_gender = st.selectbox("🚹 Gender", voice_genders, key="voice_gender")
+                sel_voice_gender = st.selectbox("🚹 Gender", voice_index["options"]["gender"], key="voice_gender")
             
             # Apply Voice Filters
-            filtered_voices = st.session_state.voices
-            if sel_lang != "All":
-                filtered_voices = [v for v in filtered_voices if sel_lang in v.get('languages', [])]
-            if sel_voice_type != "All":
-                filtered_voices = [v for v in filtered_voices if v.get('voiceType') == sel_voice_type]
-            if sel_voice_gender != "All":
-                filtered_voices = [v for v in filtered_voices if v.get('gender') == sel_voice_gender]
+            voice_options, voice_labels = filter_catalog(
+                voice_index, {"languages": sel_lang, "voiceType": sel_voice_type, "gender": sel_voice_gender}
+            )
             
-            if not filtered_voices:
+            if not voice_options:
                 st.warning("⚠️ No voices match your filters.")
-                filtered_voices = st.session_state.voices
+                voice_options, voice_labels = filter_catalog(voice_index, {})
             
-            voice_labels = {f"{v['name']} ({v.get('gender', 'N/A')}) - {'/'.join(v.get('languages', []))}": v for v in filtered_voices}
-            sel_voice_label = st.selectbox("Select Voice", list(voice_labels.keys()), key="voice_select")
+            sel_voice_label = st.selectbox("Select Voice", voice_options, key="voice_select")
             sel_voice = voice_labels[sel_voice_label]
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -795,7 +2773,7 @@ with tabs[0]:
                 words_count = len(script.split())
                 
                 col_stat1, col_stat2, col_stat3 = st.columns(3)
-                col_stat1.metric("Characters", f"{char_count}/5000")
+                col_stat1.metric("Characters", f"{char_count}/{CLIP_SCRIPT_MAX_CHARS}")
                 col_stat2.metric("Words", words_count)
                 col_stat3.metric("Est. Duration", f"{int(words_count * 0.4)}s")
                 
@@ -811,13 +2789,21 @@ with tabs[0]:
                     char_count = len(script)
                     words_count = len(script.split())
                     col_stat1, col_stat2, col_stat3 = st.columns(3)
-                    col_stat1.metric("Characters", f"{char_count}/5000")
+                    col_stat1.metric("Characters", f"{char_count}/{CLIP_SCRIPT_MAX_CHARS}")
                     col_stat2.metric("Words", words_count)
                     col_stat3.metric("Est. Duration", f"{int(words_count * 0.4)}s")
                 else:
                     st.info("📋 No generated scripts available. Go to SCRIPT GENERATOR tab to create one.")
                     script = ""
             
+            long_script_mode = st.toggle(
+                "🧩 Long-script mode",
+                key="long_script_mode",
+                help=f"Split scripts over {CLIP_SCRIPT_MAX_CHARS} characters on paragraph/sentence boundaries and render the parts in parallel"
+            )
+            if long_script_mode and len(script) > CLIP_SCRIPT_MAX_CHARS:
+                st.caption(f"🧩 Will be submitted as {len(split_script(script))} parallel parts")
+            
             st.markdown('</div>', unsafe_allow_html=True)
             
             # Generation Button
@@ -825,20 +2811,27 @@ with tabs[0]:
             if st.button("🚀 INITIATE AVATAR GENERATION", use_container_width=True, type="primary"):
                 if not script.strip():
                     st.error("❌ Script cannot be empty!")
-                elif len(script) > 5000:
-                    st.error("❌ Script exceeds 5000 character limit!")
+                elif len(script) > CLIP_SCRIPT_MAX_CHARS and long_script_mode:
+                    with st.spinner("🔄 Submitting script parts..."):
+                        start_long_script(script, sel_avatar, sel_voice)
+                    
+                    parts = st.session_state.long_script_run["parts"]
+                    failed = [i + 1 for i, part in enumerate(parts) if part["status"] == "failed"]
+                    submitted = [part for part in parts if part["status"] == "submitted"]
+                    if failed:
+                        st.error(f"❌ Failed to submit part(s): {', '.join(map(str, failed))}")
+                    if submitted:
+                        st.success(f"✅ {len(submitted)} of {len(parts)} parts initiated!")
+                        load_history(get_avatar_headers())
+                elif len(script) > CLIP_SCRIPT_MAX_CHARS:
+                    st.error(f"❌ Script exceeds {CLIP_SCRIPT_MAX_CHARS} character limit! Enable long-script mode to split it.")
                 else:
-                    with st.spinner("🔄 Processing neural synthesis..."):
-                        progress_bar = st.progress(0)
-                        for i in range(100):
-                            time.sleep(0.01)
-                            progress_bar.progress(i + 1)
-                        
-                        payload = {
+                    with st.spinner("🔄 Submitting neural synthesis..."):
+                        payload = with_webhook({
                             "actorId": sel_avatar['id'],
                             "voiceId": sel_voice['id'],
                             "script": script
-                        }
+                        })
                         
                         res, err = safe_api_call("POST", API_ENDPOINTS["GENERATE_CLIP"], get_avatar_headers(), json=payload)
                         
@@ -846,14 +2839,31 @@ with tabs[0]:
                             st.success(f"✅ Avatar generation initiated successfully!")
                             st.info(f"🆔 Project ID: `{res.get('id')}`")
                             st.balloons()
+                            if res.get('id'):
+                                register_job(res['id'], "clip", sel_avatar['name'])
                             
                             # Refresh history
-                            time.sleep(1)
-                            history, _ = safe_api_call("GET", f"{API_ENDPOINTS['GENERATE_CLIP']}?pageSize=50", get_avatar_headers())
-                            if history:
-                                st.session_state.history = history.get('items', [])
+                            load_history(get_avatar_headers())
                         else:
                             st.error(f"❌ Generation failed: {err}")
+            
+            run = st.session_state.long_script_run
+            if run and any(part["status"] == "failed" for part in run["parts"]):
+                if st.button("🔁 RETRY FAILED PARTS", use_container_width=True):
+                    with st.spinner("🔄 Resubmitting failed parts..."):
+                        run_long_script([i for i, part in enumerate(run["parts"]) if part["status"] == "failed"])
+                    st.rerun(scope="fragment")
+            unconfirmed = [i for i, part in enumerate(run["parts"]) if part["status"] == "unconfirmed"] if run else []
+            if unconfirmed:
+                st.warning(f"⚠️ Part(s) {', '.join(str(i + 1) for i in unconfirmed)} got no confirmation and may already "
+                           "have created clips. Check the Library before resubmitting them.")
+                if st.button(f"📤 RESUBMIT {len(unconfirmed)} UNCONFIRMED PART(S)", use_container_width=True):
+                    with st.spinner("🔄 Resubmitting unconfirmed parts..."):
+                        run_long_script(unconfirmed)
+                    st.rerun(scope="fragment")
+            
+            render_long_script_tracker()
+            render_job_tracker("clip")
             st.markdown('</div>', unsafe_allow_html=True)
         
         with preview_col:
@@ -888,10 +2898,55 @@ with tabs[0]:
             
             st.markdown('</div>', unsafe_allow_html=True)
 
+with tabs[0]:
+    render_avatar_studio_tab()
+
 # ------------------------------------------
 # TAB 2: AI SCRIPT GENERATOR
 # ------------------------------------------
-with tabs[1]:
+def save_generated_script(script_content, error, from_cache):
+    """Add a finished draft to the session's scripts and report the outcome"""
+    if script_content:
+        st.session_state.generated_scripts.insert(0, script_content)
+        if len(st.session_state.generated_scripts) > 10:
+            st.session_state.generated_scripts = st.session_state.generated_scripts[:10]
+        
+        if from_cache:
+            st.success("⚡ Script served from cache (enable Force Regeneration for a new draft)")
+        else:
+            st.success("✅ Script generated successfully!")
+            st.balloons()
+    else:
+        st.error(f"❌ Generation failed: {error}")
+
+def run_pending_script_stream():
+    """Stream the draft requested by the generator fragment as part of the full script run"""
+    # A click inside a fragment never interrupts a running script, so CANCEL has to live out here
+    request = st.session_state.pending_script_stream
+    if not request:
+        return
+    st.session_state.pending_script_stream = None
+    
+    # Clicking cancel triggers a rerun, which stops the stream mid-flight;
+    # the flag stays set only if the stream never got to finish
+    st.button("⏹️ CANCEL", key="cancel_script_stream")
+    st.session_state.script_stream_cancelled = True
+    stream_result = {}
+    with st.container(border=True):
+        with closing(stream_script_with_openai(
+            request["prompt"],
+            script_type=request["script_type"],
+            tone=request["tone"],
+            length=request["length"],
+            force=request["force"],
+            result=stream_result
+        )) as token_stream:
+            st.write_stream(token_stream)
+    st.session_state.script_stream_cancelled = False
+    save_generated_script(stream_result.get("content"), stream_result.get("error"), request["from_cache"])
+
+@st.fragment
+def render_script_generator_tab():
     st.markdown("## ✍️ AI-POWERED SCRIPT GENERATOR")
     
     if not st.session_state.openai_api_key:
@@ -914,13 +2969,13 @@ with tabs[1]:
             with param_col1:
                 script_type = st.selectbox(
                     "📋 Script Type",
-                    ["general", "marketing", "educational", "storytelling", "technical", "entertainment", "news", "motivational"],
+                    SCRIPT_TYPES,
                     help="Choose the style and purpose of your script"
                 )
                 
                 tone = st.selectbox(
                     "🎭 Tone",
-                    ["professional", "casual", "friendly", "authoritative", "enthusiastic", "calm", "urgent", "inspiring"],
+                    SCRIPT_TONES,
                     help="Set the emotional tone of the script"
                 )
             
@@ -956,45 +3011,97 @@ with tabs[1]:
                     height=100,
                     placeholder="Any additional requirements or constraints..."
                 )
+                force_regenerate = st.checkbox(
+                    "Force Regeneration",
+                    value=False,
+                    help="Skip the script cache and request a fresh draft"
+                )
+            
+            var_col1, var_col2, var_col3 = st.columns(3)
+            with var_col1:
+                variant_count = st.number_input("🧪 Variants", min_value=1, max_value=6, value=1,
+                                                help="Request several drafts concurrently for A/B testing")
+            with var_col2:
+                vary_by = st.selectbox("🔀 Vary Across Variants", ["Nothing", "Tone", "Script Type"],
+                                       disabled=variant_count == 1)
+            with var_col3:
+                stream_output = st.toggle("⚡ Stream output", value=True, disabled=variant_count > 1,
+                                          help="Show the script as it is written (single draft only)")
+            
+            if st.session_state.script_stream_cancelled:
+                st.session_state.script_stream_cancelled = False
+                st.warning("⏹️ Generation cancelled")
             
             if st.button("🤖 GENERATE SCRIPT", use_container_width=True, type="primary"):
                 if not topic.strip():
                     st.error("❌ Please provide a topic or description!")
                 else:
-                    with st.spinner("🧠 AI processing your request..."):
-                        progress_bar = st.progress(0)
-                        
-                        # Build enhanced prompt
-                        enhanced_prompt = topic
-                        if include_cta:
-                            enhanced_prompt += " Include a strong call-to-action."
-                        if include_stats:
-                            enhanced_prompt += " Include relevant statistics or data points."
-                        if include_questions:
-                            enhanced_prompt += " Use rhetorical questions to engage the audience."
-                        if custom_instructions:
-                            enhanced_prompt += f" Additional requirements: {custom_instructions}"
-                        
-                        for i in range(100):
-                            time.sleep(0.02)
-                            progress_bar.progress(i + 1)
-                        
-                        script_content, error = generate_script_with_openai(
-                            enhanced_prompt,
-                            script_type=script_type,
-                            tone=tone,
-                            length=length
-                        )
+                    # Build enhanced prompt
+                    enhanced_prompt = topic
+                    if include_cta:
+                        enhanced_prompt += " Include a strong call-to-action."
+                    if include_stats:
+                        enhanced_prompt += " Include relevant statistics or data points."
+                    if include_questions:
+                        enhanced_prompt += " Use rhetorical questions to engage the audience."
+                    if custom_instructions:
+                        enhanced_prompt += f" Additional requirements: {custom_instructions}"
+                    
+                    if variant_count > 1:
+                        variants = []
+                        for i in range(variant_count):
+                            variant_type, variant_tone = script_type, tone
+                            if vary_by == "Tone":
+                                variant_tone = SCRIPT_TONES[(SCRIPT_TONES.index(tone) + i) % len(SCRIPT_TONES)]
+                            elif vary_by == "Script Type":
+                                variant_type = SCRIPT_TYPES[(SCRIPT_TYPES.index(script_type) + i) % len(SCRIPT_TYPES)]
+                            variants.append((variant_type, variant_tone))
                         
-                        if script_content:
-                            st.session_state.generated_scripts.insert(0, script_content)
-                            if len(st.session_state.generated_scripts) > 10:
+                        variant_errors = []
+                        drafts_ready = 0
+                        with st.status(f"🧠 Generating {variant_count} drafts...", expanded=True) as variant_status:
+                            for (variant_type, variant_tone), drafts, error in generate_script_variants(
+                                enhanced_prompt, variants, length, get_openai_headers(), force=force_regenerate
+                            ):
+                                if error:
+                                    variant_errors.append(error)
+                                    variant_status.write(f"❌ {variant_type} / {variant_tone}: {error}")
+                                    continue
+                                for draft in drafts:
+                                    st.session_state.generated_scripts.insert(0, draft)
                                 st.session_state.generated_scripts = st.session_state.generated_scripts[:10]
-                            
-                            st.success("✅ Script generated successfully!")
-                            st.balloons()
-                        else:
-                            st.error(f"❌ Generation failed: {error}")
+                                drafts_ready += len(drafts)
+                                variant_status.write(f"✅ {variant_type} / {variant_tone}: {len(drafts)} draft(s) ready")
+                            variant_status.update(
+                                label=f"{'⚠️' if variant_errors else '✅'} {drafts_ready}/{variant_count} drafts ready",
+                                state="error" if variant_errors else "complete"
+                            )
+                    else:
+                        from_cache = not force_regenerate and script_cache_get(
+                            build_script_payload(enhanced_prompt, script_type, tone, length)
+                        ) is not None
+                    
+                        if stream_output:
+                            # Streamed in the full script run (run_pending_script_stream) so CANCEL can stop it
+                            st.session_state.pending_script_stream = {
+                                "prompt": enhanced_prompt,
+                                "script_type": script_type,
+                                "tone": tone,
+                                "length": length,
+                                "force": force_regenerate,
+                                "from_cache": from_cache,
+                            }
+                            st.rerun(scope="app")
+                        
+                        with st.spinner("🧠 AI processing your request..."):
+                            script_content, error = generate_script_with_openai(
+                                enhanced_prompt,
+                                script_type=script_type,
+                                tone=tone,
+                                length=length,
+                                force=force_regenerate
+                            )
+                        save_generated_script(script_content, error, from_cache)
             
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -1043,12 +3150,17 @@ with tabs[1]:
                     with action_col2:
                         if st.button(f"🗑️ Delete", key=f"delete_{idx}"):
                             st.session_state.generated_scripts.pop(idx)
-                            st.rerun()
+                            st.rerun(scope="fragment")
+
+with tabs[1]:
+    run_pending_script_stream()
+    render_script_generator_tab()
 
 # ------------------------------------------
 # TAB 3: VOICE DUBBING
 # ------------------------------------------
-with tabs[2]:
+@st.fragment
+def render_dubbing_tab():
     st.markdown("## 🌍 MULTILINGUAL VOICE DUBBING")
     
     st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
@@ -1073,11 +3185,11 @@ with tabs[2]:
             )
         
         with lang_col2:
-            target_lang = st.selectbox(
-                "Target Language",
-                ["es (Spanish)", "fr (French)", "de (German)", "it (Italian)", "pt (Portuguese)", 
-                 "zh (Chinese)", "ja (Japanese)", "ko (Korean)", "ar (Arabic)", "hi (Hindi)"],
-                help="Language to translate and dub into"
+            target_langs = st.multiselect(
+                "Target Languages",
+                DUBBING_LANGUAGES,
+                default=DUBBING_LANGUAGES[:1],
+                help="Languages to translate and dub into; each is submitted as its own job"
             )
         
         # Advanced Dubbing Options
@@ -1087,34 +3199,49 @@ with tabs[2]:
             background_audio = st.selectbox("Background Audio", ["Keep Original", "Remove", "Reduce by 50%"])
         
         if st.button("⚡ START DUBBING PROCESS", use_container_width=True, type="primary"):
-            if not source_url or not target_lang:
+            if not source_url or not target_langs:
                 st.error("❌ Please provide both video URL and target language!")
             else:
-                with st.spinner("🔄 Initiating dubbing pipeline..."):
-                    progress_bar = st.progress(0)
-                    stages = ["Analyzing video", "Extracting audio", "Transcribing", "Translating", "Synthesizing", "Syncing"]
-                    
-                    for i, stage in enumerate(stages):
-                        for j in range(17):
-                            time.sleep(0.01)
-                            progress_bar.progress(min((i * 17 + j), 100))
-                        st.info(f"📍 {stage}...")
-                    
-                    target_code = target_lang.split()[0]
-                    payload = {
-                        "sourceUrl": source_url,
-                        "targetLanguage": target_code,
-                        "sourceLanguage": source_lang
-                    }
-                    
-                    res, err = safe_api_call("POST", API_ENDPOINTS["DUBBING"], get_avatar_headers(), json=payload)
+                run = st.session_state.dubbing_run
+                if not run or run["source_url"] != source_url or run["source_lang"] != source_lang:
+                    run = {"source_url": source_url, "source_lang": source_lang, "languages": {}}
+                    st.session_state.dubbing_run = run
+                
+                # Languages already submitted (or possibly submitted) for this video are never resubmitted here
+                target_codes = [lang.split()[0] for lang in target_langs]
+                pending_codes = [code for code in target_codes
+                                 if run["languages"].get(code, {}).get("status") not in ("submitted", "unconfirmed")]
+                
+                if not pending_codes:
+                    st.info("ℹ️ All selected languages are already submitted for this video")
+                else:
+                    with st.spinner(f"🔄 Initiating {len(pending_codes)} dubbing pipeline(s)..."):
+                        run_dubbing_fanout(pending_codes)
                     
-                    if res:
-                        st.success("✅ Dubbing process initiated successfully!")
-                        st.info(f"🆔 Project ID: `{res.get('id', 'N/A')}`")
+                    failed = [c for c in pending_codes if run["languages"][c]["status"] == "failed"]
+                    submitted = [c for c in pending_codes if run["languages"][c]["status"] == "submitted"]
+                    if failed:
+                        st.error(f"❌ Failed to submit: {', '.join(failed)}")
+                    if submitted:
+                        st.success(f"✅ Dubbing initiated for {len(submitted)} language(s)!")
                         st.balloons()
-                    else:
-                        st.error(f"❌ Process failed: {err}")
+        
+        run = st.session_state.dubbing_run
+        if run and any(lang["status"] == "failed" for lang in run["languages"].values()):
+            if st.button("🔁 RETRY FAILED LANGUAGES", use_container_width=True):
+                with st.spinner("🔄 Resubmitting failed languages..."):
+                    run_dubbing_fanout([c for c, lang in run["languages"].items() if lang["status"] == "failed"])
+                st.rerun(scope="fragment")
+        unconfirmed = [c for c, lang in run["languages"].items() if lang["status"] == "unconfirmed"] if run else []
+        if unconfirmed:
+            st.warning(f"⚠️ {', '.join(unconfirmed)} got no confirmation and may already have created dubbing jobs. "
+                       "Check the Library before resubmitting them.")
+            if st.button(f"📤 RESUBMIT {len(unconfirmed)} UNCONFIRMED LANGUAGE(S)", use_container_width=True):
+                with st.spinner("🔄 Resubmitting unconfirmed languages..."):
+                    run_dubbing_fanout(unconfirmed)
+                st.rerun(scope="fragment")
+        
+        render_dubbing_tracker()
     
     with dub_col2:
         st.markdown("### 📋 PROCESS OVERVIEW")
@@ -1148,10 +3275,14 @@ with tabs[2]:
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+with tabs[2]:
+    render_dubbing_tab()
+
 # ------------------------------------------
 # TAB 4: LIP SYNCHRONIZATION
 # ------------------------------------------
-with tabs[3]:
+@st.fragment
+def render_lipsync_tab():
     st.markdown("## 👄 ADVANCED LIP SYNCHRONIZATION")
     
     st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
@@ -1189,26 +3320,24 @@ with tabs[3]:
             if not video_url or not audio_url:
                 st.error("❌ Both video and audio URLs are required!")
             else:
-                with st.spinner("🔄 Processing lip synchronization..."):
-                    progress_bar = st.progress(0)
-                    
-                    for i in range(100):
-                        time.sleep(0.03)
-                        progress_bar.progress(i + 1)
-                    
-                    payload = {
+                with st.spinner("🔄 Submitting lip synchronization..."):
+                    payload = with_webhook({
                         "sourceUrl": video_url,
                         "targetAudioUrl": audio_url
-                    }
+                    })
                     
                     res, err = safe_api_call("POST", API_ENDPOINTS["LIPSYNC"], get_avatar_headers(), json=payload)
                     
                     if res:
-                        st.success("✅ Lip sync process completed successfully!")
+                        st.success("✅ Lip sync process initiated successfully!")
                         st.info(f"🆔 Project ID: `{res.get('id', 'N/A')}`")
                         st.balloons()
+                        if res.get('id'):
+                            register_job(res['id'], "lipsync", "Lip sync")
                     else:
                         st.error(f"❌ Process failed: {err}")
+        
+        render_job_tracker("lipsync")
     
     with sync_col2:
         st.markdown("### 💡 USE CASES")
@@ -1239,10 +3368,14 @@ with tabs[3]:
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+with tabs[3]:
+    render_lipsync_tab()
+
 # ------------------------------------------
 # TAB 5: NEURAL LIBRARY
 # ------------------------------------------
-with tabs[4]:
+@st.fragment
+def render_library_tab():
     st.markdown("## 📁 NEURAL PROJECT LIBRARY")
     
     # Library Controls
@@ -1251,12 +3384,12 @@ with tabs[4]:
     with lib_col1:
         if st.button("🔄 REFRESH DATABASE", use_container_width=True):
             with st.spinner("Syncing..."):
-                history, _ = safe_api_call("GET", f"{API_ENDPOINTS['GENERATE_CLIP']}?pageSize=50", get_avatar_headers())
-                if history:
-                    st.session_state.history = history.get('items', [])
+                history_err = load_history(get_avatar_headers())
+                if not history_err:
                     st.success("✅ Refreshed")
-                    time.sleep(0.5)
-                    st.rerun()
+                    st.rerun(scope="fragment")
+                else:
+                    st.error(f"❌ Refresh failed: {history_err}")
     
     with lib_col2:
         status_filter = st.selectbox("🔍 Filter Status", ["All", "Completed", "Processing", "Pending", "Failed"])
@@ -1269,7 +3402,7 @@ with tabs[4]:
     
     st.markdown("---")
     
-    if not st.session_state.history:
+    if not store_count(session_key_fp()):
         st.markdown("""
         <div class="matrix-card" style="text-align: center; padding: 60px;">
             <h2>📭 LIBRARY EMPTY</h2>
@@ -1277,137 +3410,178 @@ with tabs[4]:
         </div>
         """, unsafe_allow_html=True)
     else:
-        # Filter projects
-        filtered_history = st.session_state.history
-        if status_filter != "All":
-            filtered_history = [h for h in filtered_history if h.get('status', '').lower() == status_filter.lower()]
-        
-        # Sort projects
-        if sort_by == "Newest First":
-            filtered_history = sorted(filtered_history, key=lambda x: x.get('createdDate', ''), reverse=True)
-        elif sort_by == "Oldest First":
-            filtered_history = sorted(filtered_history, key=lambda x: x.get('createdDate', ''))
-        
-        st.info(f"📊 Displaying {len(filtered_history)} projects")
+        page_col1, page_col2, page_col3 = st.columns([1, 1, 2])
+        with page_col1:
+            page_size = st.selectbox("📄 Per Page", LIBRARY_PAGE_SIZES, index=1, key="library_page_size")
+        page_count = max(1, -(-store_count(session_key_fp(), status_filter) // page_size))
+        with page_col2:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, key="library_page")
+        total_matches, page_items = get_library_page(status_filter, sort_by, page, page_size)
+        with page_col3:
+            st.info(f"📊 {total_matches} projects · page {page} of {page_count}")
         
-        # Display projects
-        for idx, item in enumerate(filtered_history):
-            status = item.get('status', 'Unknown')
-            status_class_map = {
-                'completed': 'status-completed',
-                'pending': 'status-pending',
-                'processing': 'status-processing',
-                'failed': 'status-failed'
-            }
-            status_class = status_class_map.get(status.lower(), 'status-pending')
+        if view_mode == "Grid":
+            open_item = next((h for h in page_items if h.get('id') == st.session_state.library_open), None)
+            if open_item:
+                render_project_detail(open_item, expanded=True)
             
-            with st.expander(f"🎬 Project #{item.get('id', 'N/A')[:8]}... | Status: {status}", expanded=(idx == 0 and status.lower() == 'completed')):
-                proj_col1, proj_col2 = st.columns([1, 2])
-                
-                with proj_col1:
-                    st.markdown(f'<span class="status-badge {status_class}">{status}</span>', unsafe_allow_html=True)
-                    
-                    st.markdown("**Project Details:**")
-                    st.markdown(f"- **ID:** `{item.get('id', 'N/A')}`")
-                    st.markdown(f"- **Created:** {item.get('createdDate', 'N/A')}")
-                    st.markdown(f"- **Updated:** {item.get('updatedDate', 'N/A')}")
-                    
-                    if status.lower() != "completed":
-                        if st.button("🔍 CHECK STATUS", key=f"check_{item['id']}", use_container_width=True):
-                            with st.spinner("Checking..."):
-                                res, err = safe_api_call("GET", f"{API_ENDPOINTS['GENERATE_CLIP']}/{item['id']}", get_avatar_headers())
-                                if res:
-                                    current_status = res.get('status', 'Unknown')
-                                    if current_status.lower() == "completed":
-                                        st.success("✅ Project completed!")
-                                        time.sleep(1)
-                                        st.rerun()
-                                    else:
-                                        st.info(f"Current Status: {current_status}")
-                                else:
-                                    st.error(f"Error: {err}")
-                    
-                    if status.lower() == "completed" and 'videoUrl' in item:
-                        if st.button("📥 DOWNLOAD VIDEO", key=f"dl_{item['id']}", use_container_width=True):
-                            st.success("Download link ready!")
-                            st.markdown(f"[Click to download]({item['videoUrl']})")
-                
-                with proj_col2:
-                    if status.lower() == "completed" and 'videoUrl' in item:
-                        st.markdown("**🎥 Video Preview:**")
-                        st.video(item['videoUrl'])
-                    else:
-                        st.markdown("**📝 Script:**")
-                        script_preview = item.get('script', 'No script available')
-                        st.text_area("", value=script_preview, height=150, disabled=True, key=f"script_{item['id']}")
-                        
-                        if status.lower() == "processing":
-                            st.info("⚙️ Video is being processed. Check back soon!")
+            for row_start in range(0, len(page_items), LIBRARY_GRID_COLUMNS):
+                grid_cols = st.columns(LIBRARY_GRID_COLUMNS)
+                for col, item in zip(grid_cols, page_items[row_start:row_start + LIBRARY_GRID_COLUMNS]):
+                    with col:
+                        render_project_card(item)
+        else:
+            for idx, item in enumerate(page_items):
+                render_project_detail(item, expanded=(idx == 0 and page == 1 and item.get('status', '').lower() == 'completed'))
+
+with tabs[4]:
+    render_library_tab()
 
 # ------------------------------------------
 # TAB 6: ADVANCED TOOLS
 # ------------------------------------------
-with tabs[5]:
-    st.markdown("## ⚙️ ADVANCED NEURAL TOOLS")
+@st.fragment
+def render_batch_tool():
+    st.markdown("### 🔬 BATCH VIDEO GENERATION")
+    st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
     
-    tool_tabs = st.tabs(["🔬 Batch Processing", "📊 Analytics", "⚡ API Tester", "🛠️ Utilities"])
+    st.info("🚀 Generate multiple videos simultaneously with different configurations")
     
-    with tool_tabs[0]:
-        st.markdown("### 🔬 BATCH VIDEO GENERATION")
-        st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
-        
-        st.info("🚀 Generate multiple videos simultaneously with different configurations")
-        
-        batch_file = st.file_uploader("Upload CSV with scripts (columns: script, avatar_id, voice_id)", type=['csv'])
-        
-        if batch_file:
-            df = pd.read_csv(batch_file)
-            st.dataframe(df.head())
-            
-            if st.button("🚀 START BATCH GENERATION"):
-                st.warning("⚠️ Batch processing feature coming soon!")
+    batch_file = st.file_uploader("Upload CSV with scripts (columns: script, avatar_id, voice_id)", type=['csv'])
+    batch_concurrency = st.slider("Concurrent submissions", 1, 16, BATCH_DEFAULT_CONCURRENCY)
+    
+    if batch_file:
+        import pandas as pd
+        df = pd.read_csv(batch_file, dtype=str, keep_default_na=False)  # IDs stay verbatim, e.g. 3 not 3.0
+        st.dataframe(df.head())
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        missing_cols = {"script", "avatar_id", "voice_id"} - set(df.columns)
+        if missing_cols:
+            st.error(f"❌ CSV is missing columns: {', '.join(sorted(missing_cols))}")
+        elif st.button("🚀 START BATCH GENERATION"):
+            batch = create_batch(session_key_fp(), batch_file.getvalue(), df, batch_concurrency)
+            if start_batch(batch, get_avatar_headers()):
+                st.success(f"✅ Batch `{batch['id']}` started ({len(batch['rows'])} rows)")
+            else:
+                st.info(f"ℹ️ Batch `{batch['id']}` is already running")
+            st.session_state.active_batch = batch['id']
     
-    with tool_tabs[1]:
-        st.markdown("### 📊 PROJECT ANALYTICS")
-        st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    saved_batches = list_saved_batches(session_key_fp())
+    if saved_batches:
+        st.markdown("---")
+        st.markdown("#### 📦 BATCH RUNS")
+        if st.session_state.get("active_batch") not in saved_batches:
+            st.session_state.active_batch = saved_batches[0]
+        active_batch = st.selectbox("Batch", saved_batches, key="active_batch")
         
-        if st.session_state.history:
-            # Calculate statistics
-            total_projects = len(st.session_state.history)
-            completed = len([h for h in st.session_state.history if h.get('status', '').lower() == 'completed'])
-            processing = len([h for h in st.session_state.history if h.get('status', '').lower() in ['processing', 'pending']])
-            failed = len([h for h in st.session_state.history if h.get('status', '').lower() == 'failed'])
+        batch = load_batch(session_key_fp(), active_batch)
+        if batch:
+            with BATCH_REGISTRY["lock"]:
+                running = active_batch in BATCH_REGISTRY["threads"]
+                settled = not running and settle_interrupted_rows(batch)
+            if settled:
+                save_batch(batch)
+            unconfirmed = [r for r in batch["rows"] if r["status"] == "unconfirmed"]
             
-            met_col1, met_col2, met_col3, met_col4 = st.columns(4)
-            met_col1.metric("Total Projects", total_projects, delta=None)
-            met_col2.metric("Completed", completed, delta=f"{int(completed/total_projects*100)}%")
-            met_col3.metric("In Progress", processing)
-            met_col4.metric("Failed", failed)
+            run_col1, run_col2 = st.columns(2)
+            with run_col1:
+                if batch_has_pending_work(batch) and not running:
+                    if st.button("▶️ RESUME BATCH", use_container_width=True):
+                        start_batch(batch, get_avatar_headers())
+            with run_col2:
+                # Hidden while running: the runner only submits the rows that were queued when it started
+                if not running and st.button("🔁 RETRY FAILED ROWS", use_container_width=True):
+                    retry_failed_rows(batch)
+                    save_batch(batch)
+                    start_batch(batch, get_avatar_headers())
             
-            # Status distribution chart
-            st.markdown("### 📈 Status Distribution")
-            status_data = {
-                'Status': ['Completed', 'Processing', 'Failed'],
-                'Count': [completed, processing, failed]
-            }
-            st.bar_chart(pd.DataFrame(status_data).set_index('Status'))
-        else:
-            st.info("No data available for analytics")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+            if unconfirmed and not running:
+                st.warning(f"⚠️ {len(unconfirmed)} row(s) got no confirmation of their submission and may already "
+                           "have created clips. Check the Library before resubmitting them.")
+                if st.button(f"📤 RESUBMIT {len(unconfirmed)} UNCONFIRMED ROW(S)", use_container_width=True):
+                    resubmit_unconfirmed_rows(batch)
+                    save_batch(batch)
+                    start_batch(batch, get_avatar_headers())
+            
+            if active_batch in BATCH_REGISTRY["threads"]:  # re-checked: a button above may have just started it
+                render_live_batch_monitor(active_batch)
+            else:
+                render_batch_monitor(active_batch)
     
-    with tool_tabs[2]:
-        st.markdown("### ⚡ API ENDPOINT TESTER")
-        st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+def render_analytics_tool():
+    import pandas as pd
+    st.markdown("### 📊 PROJECT ANALYTICS")
+    st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    
+    if store_count(session_key_fp()):
+        frame = get_history_frame()
+        total_projects = len(frame)
+        status_counts = cached_analytic(status_counts_of)
+        completed = int(status_counts.get('completed', 0))
+        processing = int(status_counts.get('processing', 0) + status_counts.get('pending', 0))
+        failed = int(status_counts.get('failed', 0))
         
-        endpoint = st.selectbox("Select Endpoint", list(API_ENDPOINTS.keys()))
-        method = st.radio("Method", ["GET", "POST"], horizontal=True)
+        met_col1, met_col2, met_col3, met_col4 = st.columns(4)
+        met_col1.metric("Total Projects", total_projects, delta=None)
+        met_col2.metric("Completed", completed, delta=f"{int(completed/total_projects*100)}%")
+        met_col3.metric("In Progress", processing)
+        met_col4.metric("Failed", failed)
         
-        if method == "POST":
-            payload_input = st.text_area("Request Payload (JSON)", height=150, value='{\n  "key": "value"\n}')
+        # Status distribution chart
+        st.markdown("### 📈 Status Distribution")
+        status_data = {
+            'Status': ['Completed', 'Processing', 'Failed'],
+            'Count': [completed, processing, failed]
+        }
+        st.bar_chart(pd.DataFrame(status_data).set_index('Status'))
+        
+        # Render latency (createdDate -> updatedDate of completed projects)
+        st.markdown("### ⏱️ Render Latency")
+        latency = cached_analytic(render_latency_percentiles)
+        lat_col1, lat_col2, lat_col3, lat_col4 = st.columns(4)
+        lat_col1.metric("p50", format_duration(latency["p50"]))
+        lat_col2.metric("p95", format_duration(latency["p95"]))
+        lat_col3.metric("p99", format_duration(latency["p99"]))
+        lat_col4.metric("Samples", latency["count"])
         
+        granularity = st.radio("Time Bucket", ["Hour", "Day"], index=1, horizontal=True, key="analytics_bucket")
+        freq = "h" if granularity == "Hour" else "D"
+        
+        st.markdown(f"### 🚀 Throughput per {granularity}")
+        st.bar_chart(cached_analytic(throughput_series, freq))
+        
+        st.markdown(f"### ⚠️ Failure Rate per {granularity}")
+        st.line_chart(cached_analytic(failure_rate_series, freq))
+        
+        st.markdown("### 🧬 Breakdown")
+        breakdown_by = st.radio("Group By", ["Avatar", "Voice"], horizontal=True, key="analytics_breakdown")
+        st.dataframe(
+            cached_analytic(history_breakdown, "actorId" if breakdown_by == "Avatar" else "voiceId"),
+            use_container_width=True
+        )
+    else:
+        st.info("No data available for analytics")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+def render_api_tester_tool():
+    st.markdown("### ⚡ API ENDPOINT TESTER")
+    st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    
+    endpoint = st.selectbox("Select Endpoint", list(API_ENDPOINTS.keys()))
+    method = st.radio("Method", ["GET", "POST"], horizontal=True)
+    tester_mode = st.radio("Mode", ["Single Request", "Benchmark"], horizontal=True)
+    
+    if method == "POST":
+        payload_input = st.text_area("Request Payload (JSON)", height=150, value='{\n  "key": "value"\n}')
+    
+    if tester_mode == "Single Request":
         if st.button("🧪 TEST ENDPOINT"):
             with st.spinner("Testing..."):
                 if method == "GET":
@@ -1425,42 +3599,178 @@ with tabs[5]:
                     st.json(res)
                 else:
                     st.error(f"❌ Request failed: {err}")
+    else:
+        if method == "POST":
+            st.warning("⚠️ POST benchmarks create real jobs on the target service")
+        
+        bench_col1, bench_col2, bench_col3, bench_col4 = st.columns(4)
+        bench_total = bench_col1.number_input("Total Requests", min_value=1, max_value=5000, value=50)
+        bench_concurrency = bench_col2.number_input("Concurrency", min_value=1, max_value=64, value=5)
+        bench_warmup = bench_col3.number_input("Warmup", min_value=0, max_value=100, value=3)
+        bench_rate = bench_col4.number_input("Rate Limit (req/s, 0 = none)", min_value=0.0, value=0.0, step=1.0)
+        
+        if st.button("🏁 RUN BENCHMARK"):
+            bench_payload = None
+            if method == "POST":
+                try:
+                    bench_payload = json.loads(payload_input)
+                except json.JSONDecodeError:
+                    st.error("Invalid JSON payload")
+                    return
+            
+            bench_progress = st.progress(0.0, text="Benchmarking...")
+            run = run_benchmark(
+                endpoint, method, get_avatar_headers(), bench_payload,
+                total=int(bench_total), concurrency=int(bench_concurrency),
+                warmup=int(bench_warmup), rate=bench_rate,
+                on_progress=lambda fraction: bench_progress.progress(fraction, text="Benchmarking...")
+            )
+            save_benchmark_run(run)
+            bench_progress.progress(1.0, text=f"Finished in {run['wall_time_s']:.1f}s")
+            
+            res_col1, res_col2, res_col3, res_col4, res_col5 = st.columns(5)
+            res_col1.metric("Throughput", f"{run['throughput_rps']:.1f} req/s")
+            res_col2.metric("p50", f"{run['p50_ms']:.0f} ms")
+            res_col3.metric("p90", f"{run['p90_ms']:.0f} ms")
+            res_col4.metric("p99", f"{run['p99_ms']:.0f} ms")
+            res_col5.metric("Max", f"{run['max_ms']:.0f} ms")
+            if run["queue_wait_ms"] >= 1:
+                st.caption(f"🚦 Latencies are upstream only; requests also queued {run['queue_wait_ms']:.0f} ms on average in the rate limiter")
+            if run["errors"]:
+                st.error(f"❌ {run['total'] - run['success']} errors: " + ", ".join(f"{k}: {v}" for k, v in run["errors"].items()))
+            else:
+                st.success(f"✅ All {run['total']} requests succeeded")
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        saved_runs = load_benchmark_runs()
+        if saved_runs:
+            st.markdown("#### 📊 COMPARE RUNS")
+            runs_by_label = {benchmark_label(r): r for r in saved_runs}
+            compare_labels = st.multiselect("Saved runs", list(runs_by_label), default=list(runs_by_label)[:2])
+            if compare_labels:
+                compare_rows = benchmark_summary_rows([runs_by_label[label] for label in compare_labels])
+                st.dataframe(compare_rows, use_container_width=True, hide_index=True)
+                st.bar_chart(
+                    {row["Run"]: [row["p50 (ms)"], row["p90 (ms)"], row["p99 (ms)"]] for row in compare_rows}
+                    | {"Percentile": ["p50", "p90", "p99"]},
+                    x="Percentile",
+                    stack=False
+                )
     
-    with tool_tabs[3]:
-        st.markdown("### 🛠️ UTILITY TOOLS")
-        st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+def render_api_metrics_tool():
+    st.markdown("### 📡 API METRICS")
+    st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    
+    metrics_snapshot = api_metrics_snapshot()
+    uptime = int(time.time() - API_METRICS["started_at"])
+    st.caption(f"Process-wide counters since {uptime // 60} min ago")
+    
+    if metrics_snapshot:
+        st.dataframe(api_metrics_table(metrics_snapshot), use_container_width=True, hide_index=True)
         
-        util_col1, util_col2 = st.columns(2)
+        metrics_col1, metrics_col2 = st.columns(2)
+        with metrics_col1:
+            st.download_button(
+                "📥 EXPORT PROMETHEUS",
+                data=(api_metrics_prometheus(metrics_snapshot) + startup_metrics_prometheus(startup_metrics_summary())
+                      + webhook_metrics_prometheus(webhook_summary())),
+                file_name="cloner_api_metrics.prom",
+                mime="text/plain",
+                use_container_width=True
+            )
+        with metrics_col2:
+            if st.button("♻️ RESET COUNTERS", use_container_width=True):
+                with API_METRICS["lock"]:
+                    API_METRICS["endpoints"].clear()
+                    API_METRICS["started_at"] = time.time()
+                st.rerun(scope="fragment")
+    else:
+        st.info("No API calls recorded yet")
+    
+    limiter_rows = rate_limiter_table()
+    if limiter_rows:
+        st.markdown("#### 🚦 RATE LIMITERS")
+        st.dataframe(limiter_rows, use_container_width=True, hide_index=True)
+    
+    st.markdown("#### 🚀 STARTUP")
+    startup = startup_metrics_summary()
+    startup_col1, startup_col2, startup_col3, startup_col4 = st.columns(4)
+    startup_col1.metric("Cold Import", f"{startup['import_seconds'] * 1000:.0f} ms")
+    startup_col2.metric("First Render p50", f"{startup['p50'] * 1000:.0f} ms" if startup['p50'] is not None else "—")
+    startup_col3.metric("First Render p95", f"{startup['p95'] * 1000:.0f} ms" if startup['p95'] is not None else "—")
+    startup_col4.metric("Sessions", startup['sessions'])
+    
+    st.markdown("#### 🪝 WEBHOOKS")
+    webhooks = webhook_summary()
+    if webhooks["url"]:
+        st.caption(f"Receiving job callbacks at `{webhooks['url'].split('?', 1)[0]}` · polling resumes after {WEBHOOK_FALLBACK_AFTER}s without one")
+        hook_col1, hook_col2, hook_col3, hook_col4 = st.columns(4)
+        hook_col1.metric("Received", webhooks["received"])
+        hook_col2.metric("Waiting", webhooks["waiting"])
+        hook_col3.metric("Unclaimed / Rejected", f"{webhooks['unclaimed']} / {webhooks['rejected']}")
+        hook_col4.metric("Fallback Polls", webhooks["fallback_polls"])
+    else:
+        st.info(webhooks["error"] or "Webhook receiver off: set CLONER_WEBHOOK_PORT and CLONER_WEBHOOK_URL to get job callbacks instead of polling")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+def render_utilities_tool():
+    st.markdown("### 🛠️ UTILITY TOOLS")
+    st.markdown('<div class="matrix-card">', unsafe_allow_html=True)
+    
+    util_col1, util_col2 = st.columns(2)
+    
+    with util_col1:
+        st.markdown("#### 📝 Script Analyzer")
+        analyze_text = st.text_area("Paste script to analyze", height=150)
         
-        with util_col1:
-            st.markdown("#### 📝 Script Analyzer")
-            analyze_text = st.text_area("Paste script to analyze", height=150)
-            
-            if st.button("🔍 ANALYZE"):
-                if analyze_text:
-                    words = len(analyze_text.split())
-                    chars = len(analyze_text)
-                    sentences = analyze_text.count('.') + analyze_text.count('!') + analyze_text.count('?')
-                    
-                    st.write(f"**Words:** {words}")
-                    st.write(f"**Characters:** {chars}")
-                    st.write(f"**Sentences:** {sentences}")
-                    st.write(f"**Estimated Duration:** {int(words * 0.4)} seconds")
-                    st.write(f"**Reading Level:** {'Easy' if words/sentences < 15 else 'Medium' if words/sentences < 20 else 'Complex'}")
+        if st.button("🔍 ANALYZE"):
+            if analyze_text:
+                words = len(analyze_text.split())
+                chars = len(analyze_text)
+                sentences = analyze_text.count('.') + analyze_text.count('!') + analyze_text.count('?')
+                
+                st.write(f"**Words:** {words}")
+                st.write(f"**Characters:** {chars}")
+                st.write(f"**Sentences:** {sentences}")
+                st.write(f"**Estimated Duration:** {int(words * 0.4)} seconds")
+                st.write(f"**Reading Level:** {'Easy' if words/sentences < 15 else 'Medium' if words/sentences < 20 else 'Complex'}")
+    
+    with util_col2:
+        st.markdown("#### 🎨 Thumbnail Generator")
+        st.info("🖼️ Generate custom thumbnails for your videos")
         
-        with util_col2:
-            st.markdown("#### 🎨 Thumbnail Generator")
-            st.info("🖼️ Generate custom thumbnails for your videos")
-            
-            thumb_text = st.text_input("Thumbnail Text")
-            thumb_color = st.color_picker("Text Color", "#00ff41")
-            
-            if st.button("🎨 GENERATE THUMBNAIL"):
-                st.warning("⚠️ Feature coming soon!")
+        thumb_text = st.text_input("Thumbnail Text")
+        thumb_color = st.color_picker("Text Color", "#00ff41")
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        if st.button("🎨 GENERATE THUMBNAIL"):
+            st.warning("⚠️ Feature coming soon!")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+with tabs[5]:
+    st.markdown("## ⚙️ ADVANCED NEURAL TOOLS")
+    
+    tool_tabs = st.tabs(["🔬 Batch Processing", "📊 Analytics", "⚡ API Tester", "📡 API Metrics", "🛠️ Utilities"],
+                        key="tool_tabs", on_change="rerun")
+    
+    with tool_tabs[0]:
+        render_batch_tool()
+    with tool_tabs[1]:
+        # Analytics (and pandas) load only once the tool is opened
+        if tool_tabs[1].open:
+            render_analytics_tool()
+    with tool_tabs[2]:
+        render_api_tester_tool()
+    with tool_tabs[3]:
+        render_api_metrics_tool()
+    with tool_tabs[4]:
+        render_utilities_tool()
 
 # ==========================================
 # FOOTER
@@ -1476,3 +3786,6 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# Last statement of a full run: the session's first render is complete
+record_first_render()
@@ -0,0 +1,381 @@
+"""
+Local stand-in for the Pipio and OpenAI APIs used by App.py.
+
+Serves every upstream endpoint from one host so the app can be exercised,
+load-tested and benchmarked offline:
+
+    python mock_server.py --port 8765 --latency-ms 80 --error-rate 0.02 --job-seconds 30
+    CLONER_API_BASE_URL=http://127.0.0.1:8765 streamlit run App.py
+
+Any API key is accepted. Runs are reproducible for a given --seed.
+Jobs submitted with a callbackUrl are POSTed there when they finish;
+--callback-drop-rate loses a share of them to exercise polling fallbacks.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==========================================
+# MOCK CONFIGURATION & STATE
+# ==========================================
+CONFIG = {
+    "latency_ms": 50,  # mean added latency per request
+    "jitter_ms": 20,  # uniform +/- jitter around the mean
+    "error_rate": 0.0,  # share of requests answered with 503
+    "job_seconds": 20,  # time for a job to go Pending -> Completed
+    "fail_rate": 0.0,  # share of jobs that end as Failed
+    "token_delay_ms": 15,  # delay between streamed completion chunks
+    "rate_limit": 0,  # requests/sec before answering 429 with Retry-After (0 = unlimited)
+    "callback_drop_rate": 0.0,  # share of job callbacks never sent, to exercise the polling fallback
+}
+
+STATE = {
+    "lock": threading.Lock(),
+    "rng": random.Random(0),
+    "projects": {},  # id -> project dict
+    "order": [],  # project ids, newest first
+    "window": [0, 0],  # [second, requests seen in it] for the rate limit
+}
+
+GENDERS = ["Male", "Female"]
+ETHNICITIES = ["Asian", "Black", "Caucasian", "Hispanic", "Middle Eastern"]
+AGE_GROUPS = ["Young Adult", "Adult", "Senior"]
+LANGUAGES = ["en", "es", "fr", "de", "it", "pt", "zh", "ja", "ko", "ar", "hi"]
+VOICE_TYPES = ["Neural", "Standard", "Cloned"]
+
+SAMPLE_TEXT = (
+    "Welcome to the future of video. In the next minute you will see how a digital twin "
+    "can present your ideas with a natural voice, clear delivery and zero studio time. "
+    "Let's get started."
+)
+
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def build_catalogs(avatar_count, voice_count):
+    """Deterministic avatar and voice catalogs"""
+    rng = random.Random(1)
+    avatars = [{
+        "id": f"actor-{i:04d}",
+        "name": f"Avatar {i:04d}",
+        "gender": rng.choice(GENDERS),
+        "ethnicity": rng.choice(ETHNICITIES),
+        "ageGroup": rng.choice(AGE_GROUPS),
+        "thumbnailImagePath": f"https://picsum.photos/seed/actor{i}/320/180",
+    } for i in range(avatar_count)]
+    voices = [{
+        "id": f"voice-{i:04d}",
+        "name": f"Voice {i:04d}",
+        "gender": rng.choice(GENDERS),
+        "voiceType": rng.choice(VOICE_TYPES),
+        "languages": rng.sample(LANGUAGES, rng.randint(1, 3)),
+        "previewAudioPath": "",
+    } for i in range(voice_count)]
+    return avatars, voices
+
+
+def seed_history(count):
+    """Pre-populate finished projects so history pagination has something to page through"""
+    rng = STATE["rng"]
+    for i in range(count):
+        age = (count - i) * 600
+        project = new_project("clip", {"script": SAMPLE_TEXT, "actorId": f"actor-{i % 50:04d}",
+                                       "voiceId": f"voice-{i % 30:04d}"}, created_offset=-age)
+        project["ready_at"] = time.time() - age + rng.uniform(30, 900)
+        STATE["projects"][project["id"]] = project
+        STATE["order"].insert(0, project["id"])
+
+
+def new_project(kind, body, created_offset=0.0):
+    rng = STATE["rng"]
+    created = time.time() + created_offset
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "kind": kind,
+        "createdAt": created,
+        "ready_at": created + CONFIG["job_seconds"] * rng.uniform(0.5, 1.5),
+        "fails": rng.random() < CONFIG["fail_rate"],
+        "script": body.get("script"),
+        "actorId": body.get("actorId"),
+        "voiceId": body.get("voiceId"),
+        "sourceUrl": body.get("sourceUrl"),
+        "targetLanguage": body.get("targetLanguage"),
+        "callbackUrl": body.get("callbackUrl"),
+    }
+
+
+def project_view(project):
+    """Public JSON for a project, with status derived from elapsed time"""
+    now = time.time()
+    total = max(project["ready_at"] - project["createdAt"], 0.001)
+    elapsed = now - project["createdAt"]
+    if now >= project["ready_at"]:
+        status = "Failed" if project["fails"] else "Completed"
+        updated = project["ready_at"]
+    elif elapsed < total * 0.1:
+        status, updated = "Pending", project["createdAt"]
+    else:
+        status, updated = "Processing", now
+
+    view = {
+        "id": project["id"],
+        "status": status,
+        "progress": round(min(elapsed / total, 1.0) * 100),
+        "createdDate": iso_time(project["createdAt"]),
+        "updatedDate": iso_time(updated),
+    }
+    for key in ("script", "actorId", "voiceId", "sourceUrl", "targetLanguage"):
+        if project.get(key) is not None:
+            view[key] = project[key]
+    if status == "Completed":
+        view["videoUrl"] = f"https://example.com/mock/{project['id']}.mp4"
+        view["thumbnailUrl"] = f"https://picsum.photos/seed/{project['id'][:8]}/320/180"
+    return view
+
+
+def send_callback(project):
+    """POST the finished project to its callbackUrl, retrying briefly like a real webhook sender"""
+    with STATE["lock"]:
+        view = project_view(project)
+    request = urllib.request.Request(
+        project["callbackUrl"], data=json.dumps(view).encode(),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    for attempt in range(3):
+        try:
+            with urllib.request.urlopen(request, timeout=5):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(2 ** attempt)
+
+
+def schedule_callback(project):
+    delay = max(project["ready_at"] - time.time(), 0) + 0.01
+    timer = threading.Timer(delay, send_callback, args=(project,))
+    timer.daemon = True
+    timer.start()
+
+
+# ==========================================
+# REQUEST HANDLER
+# ==========================================
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+    server_version = "ClonerMock/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def simulate_network(self):
+        """Apply latency and injected failures; returns False when the request was answered with an error"""
+        with STATE["lock"]:
+            rng = STATE["rng"]
+            delay = max(CONFIG["latency_ms"] + rng.uniform(-CONFIG["jitter_ms"], CONFIG["jitter_ms"]), 0)
+            fail = rng.random() < CONFIG["error_rate"]
+            now = time.time()
+            if STATE["window"][0] != int(now):
+                STATE["window"] = [int(now), 0]
+            STATE["window"][1] += 1
+            limited = CONFIG["rate_limit"] and STATE["window"][1] > CONFIG["rate_limit"]
+        time.sleep(delay / 1000)
+        if limited:
+            self.send_json(429, {"error": "Rate limit exceeded"}, {"Retry-After": "1"})
+            return False
+        if fail:
+            self.send_json(503, {"error": "Injected failure"})
+            return False
+        if not self.headers.get("Authorization"):
+            self.send_json(401, {"error": "Missing Authorization header"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.simulate_network():
+            return
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        query = parse_qs(url.query)
+
+        if path == "/actor":
+            return self.send_json(200, {"items": self.server.avatars})
+        if path == "/voice":
+            return self.send_json(200, {"items": self.server.voices})
+        if path == "/single-clip":
+            return self.list_projects(query)
+        if path.startswith("/single-clip/") or path.startswith("/project/"):
+            return self.get_project(path.rsplit("/", 1)[-1])
+        self.send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self):
+        if not self.simulate_network():
+            return
+        path = urlparse(self.path).path.rstrip("/")
+        body = self.read_json()
+        if body is None:
+            return self.send_json(400, {"error": "Invalid JSON body"})
+
+        if path == "/single-clip":
+            if not body.get("script") or not body.get("actorId") or not body.get("voiceId"):
+                return self.send_json(400, {"error": "script, actorId and voiceId are required"})
+            return self.create_project("clip", body)
+        if path == "/project/generate/dubbingV2":
+            if not body.get("sourceUrl") or not body.get("targetLanguage"):
+                return self.send_json(400, {"error": "sourceUrl and targetLanguage are required"})
+            return self.create_project("dubbing", body)
+        if path == "/project/generate/lipsync":
+            if not body.get("sourceUrl") or not body.get("targetAudioUrl"):
+                return self.send_json(400, {"error": "sourceUrl and targetAudioUrl are required"})
+            return self.create_project("lipsync", body)
+        if path == "/v1/chat/completions":
+            return self.chat_completion(body)
+        self.send_json(404, {"error": f"Unknown path {path}"})
+
+    def list_projects(self, query):
+        page_size = int(query.get("pageSize", ["50"])[0])
+        page = int(query.get("page", query.get("cursor", ["1"]))[0])
+        with STATE["lock"]:
+            clip_ids = [pid for pid in STATE["order"] if STATE["projects"][pid]["kind"] == "clip"]
+            ids = clip_ids[(page - 1) * page_size:page * page_size]
+            items = [project_view(STATE["projects"][pid]) for pid in ids]
+        self.send_json(200, {"items": items, "page": page, "pageSize": page_size})
+
+    def get_project(self, project_id):
+        with STATE["lock"]:
+            project = STATE["projects"].get(project_id)
+            view = project_view(project) if project else None
+        if view is None:
+            return self.send_json(404, {"error": "Project not found"})
+        self.send_json(200, view)
+
+    def create_project(self, kind, body):
+        with STATE["lock"]:
+            project = new_project(kind, body)
+            STATE["projects"][project["id"]] = project
+            STATE["order"].insert(0, project["id"])
+            view = project_view(project)
+            notify = project["callbackUrl"] and STATE["rng"].random() >= CONFIG["callback_drop_rate"]
+        self.send_json(201, view)
+        if notify:
+            schedule_callback(project)
+
+    def chat_completion(self, body):
+        n = int(body.get("n", 1))
+        topic = body.get("messages", [{}])[-1].get("content", "")[:80]
+        texts = [f"[Draft {i + 1}] {SAMPLE_TEXT} (Topic: {topic})" for i in range(n)]
+
+        if not body.get("stream"):
+            return self.send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "model": body.get("model", "gpt-4"),
+                "choices": [{"index": i, "message": {"role": "assistant", "content": t}, "finish_reason": "stop"}
+                            for i, t in enumerate(texts)],
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in texts[0].split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(CONFIG["token_delay_ms"] / 1000)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+# ==========================================
+# ENTRY POINT
+# ==========================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local mock of the Pipio and OpenAI APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=CONFIG["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=CONFIG["jitter_ms"])
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"], help="share of requests failing with 503")
+    parser.add_argument("--job-seconds", type=float, default=CONFIG["job_seconds"], help="mean job completion time")
+    parser.add_argument("--fail-rate", type=float, default=CONFIG["fail_rate"], help="share of jobs that end Failed")
+    parser.add_argument("--token-delay-ms", type=float, default=CONFIG["token_delay_ms"])
+    parser.add_argument("--rate-limit", type=float, default=CONFIG["rate_limit"], help="requests/sec before answering 429")
+    parser.add_argument("--callback-drop-rate", type=float, default=CONFIG["callback_drop_rate"],
+                        help="share of job callbacks (callbackUrl) never sent")
+    parser.add_argument("--avatars", type=int, default=200)
+    parser.add_argument("--voices", type=int, default=120)
+    parser.add_argument("--history", type=int, default=500, help="finished projects to pre-seed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def make_server(args):
+    """Configure global state from parsed args and build (but do not start) the server"""
+    CONFIG.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        job_seconds=args.job_seconds,
+        fail_rate=args.fail_rate,
+        token_delay_ms=args.token_delay_ms,
+        rate_limit=args.rate_limit,
+        callback_drop_rate=args.callback_drop_rate,
+    )
+    STATE["rng"] = random.Random(args.seed)
+    STATE["projects"].clear()
+    STATE["order"].clear()
+    seed_history(args.history)
+
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    server.avatars, server.voices = build_catalogs(args.avatars, args.voices)
+    server.verbose = args.verbose
+    return server
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = make_server(args)
+    print(f"Mock API listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}ms, errors {args.error_rate:.0%}, jobs ~{args.job_seconds}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()